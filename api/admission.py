@@ -0,0 +1,215 @@
+import os
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+
+# ==================================================
+# 🔑 CONFIG
+# ==================================================
+# A fila de espera fica no event loop; só o trabalho admitido vai para o
+# threadpool do AnyIO (40 threads por padrão), então a soma das
+# concorrências das classes deve ficar abaixo desse limite.
+
+ADMISSION_CLASSES = {
+    "analitica": {
+        "concurrency": int(os.getenv("ADMISSION_ANALYTICAL_CONCURRENCY", "4")),
+        "queue": int(os.getenv("ADMISSION_ANALYTICAL_QUEUE", "8")),
+        "max_wait_s": float(os.getenv("ADMISSION_ANALYTICAL_WAIT_S", "15")),
+    },
+    "generica": {
+        "concurrency": int(os.getenv("ADMISSION_GENERIC_CONCURRENCY", "12")),
+        "queue": int(os.getenv("ADMISSION_GENERIC_QUEUE", "16")),
+        "max_wait_s": float(os.getenv("ADMISSION_GENERIC_WAIT_S", "5")),
+    },
+}
+
+# ==================================================
+# 🚦 CONTROLE DE ADMISSÃO
+# ==================================================
+
+class Overloaded(Exception):
+    """Fila cheia (429) ou prazo de espera estourado (503)."""
+
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+class ClassLimiter:
+    """
+    Vagas por classe. Quem espera é um future do event loop (não ocupa
+    thread); release() pode vir de qualquer thread e passa a vaga direto
+    ao primeiro da fila.
+    """
+
+    def __init__(self, name, concurrency, queue, max_wait_s):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue)
+        self.max_wait_s = max_wait_s
+        self.lock = threading.Lock()
+        self.running = 0
+        self.waiters = deque()
+        self.avg_service_s = 1.0        # média móvel, usada no Retry-After
+        self.counters = {
+            "admitted": 0,
+            "rejected_queue_full": 0,
+            "rejected_deadline": 0,
+            "queue_wait_s": 0.0
+        }
+
+    def retry_after(self) -> int:
+        backlog = (len(self.waiters) + 1) / self.concurrency
+        return max(1, math.ceil(backlog * self.avg_service_s))
+
+    def try_acquire(self) -> bool:
+        """Vaga sem espera, para trabalho de fundo fora do event loop."""
+        with self.lock:
+            if self.running < self.concurrency and not self.waiters:
+                self.running += 1
+                self.counters["admitted"] += 1
+                return True
+            return False
+
+    async def acquire(self):
+        with self.lock:
+            if self.running < self.concurrency and not self.waiters:
+                self.running += 1
+                self.counters["admitted"] += 1
+                return
+
+            if len(self.waiters) >= self.queue_size:
+                self.counters["rejected_queue_full"] += 1
+                raise Overloaded(429, self.retry_after(), f"fila '{self.name}' cheia")
+
+            fut = asyncio.get_running_loop().create_future()
+            self.waiters.append(fut)
+
+        t0 = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), self.max_wait_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self.lock:
+                expired = fut in self.waiters
+                if expired:
+                    self.waiters.remove(fut)
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.counters["rejected_deadline"] += 1
+
+            if not expired:
+                # a vaga chegou junto com o prazo/cancelamento
+                if isinstance(e, asyncio.TimeoutError):
+                    return self._admitted(time.monotonic() - t0)
+                self.release()
+                raise
+
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise Overloaded(503, self.retry_after(), f"espera na fila '{self.name}' excedida")
+
+        self._admitted(time.monotonic() - t0)
+
+    def _admitted(self, waited):
+        with self.lock:
+            self.counters["admitted"] += 1
+            self.counters["queue_wait_s"] += waited
+
+    def release(self, service_s=None):
+        with self.lock:
+            if service_s is not None:
+                self.avg_service_s = 0.8 * self.avg_service_s + 0.2 * service_s
+            if self.waiters:
+                # running não muda: a vaga passa direto para quem esperava
+                fut = self.waiters.popleft()
+                fut.get_loop().call_soon_threadsafe(_wake, fut)
+            else:
+                self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - t0)
+
+    def stats(self) -> dict:
+        with self.lock:
+            c = dict(self.counters)
+            out = {
+                "running": self.running,
+                "waiting": len(self.waiters),
+                "concurrency": self.concurrency,
+                "queue": self.queue_size,
+                "admitted": c["admitted"],
+                "rejected_queue_full": c["rejected_queue_full"],
+                "rejected_deadline": c["rejected_deadline"],
+                "mean_queue_wait_ms": round(1000 * c["queue_wait_s"] / c["admitted"], 2) if c["admitted"] else 0.0,
+                "avg_service_s": round(self.avg_service_s, 3)
+            }
+        return out
+
+def _wake(fut):
+    if not fut.done():
+        fut.set_result(None)
+
+class AdmissionController:
+    def __init__(self, classes=ADMISSION_CLASSES):
+        self.limiters = {
+            name: ClassLimiter(name, **cfg)
+            for name, cfg in classes.items()
+        }
+
+    def slot(self, query_class: str):
+        return self.limiters[query_class].slot()
+
+    def try_acquire(self, query_class: str) -> bool:
+        return self.limiters[query_class].try_acquire()
+
+    def release(self, query_class: str):
+        self.limiters[query_class].release()
+
+    def stats(self) -> dict:
+        return {name: l.stats() for name, l in self.limiters.items()}
+
+# ==================================================
+# 🔗 SINGLE-FLIGHT NO EVENT LOOP
+# ==================================================
+
+class AsyncSingleFlight:
+    """
+    Chamadas concorrentes com a mesma chave aguardam o future do líder,
+    sem ocupar thread enquanto esperam.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        fut = self.calls.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self.calls[key] = fut
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()     # sem seguidores, não vira aviso de exceção não lida
+            raise
+        finally:
+            self.calls.pop(key, None)
+
+        fut.set_result(result)
+        return result
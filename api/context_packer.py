@@ -0,0 +1,150 @@
+import os
+import re
+import threading
+from collections import deque
+from api.llm_client import count_tokens, truncate_tokens
+
+# ==================================================
+# 🔑 CONFIG
+# ==================================================
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_PASSAGE_TOKENS = int(os.getenv("CONTEXT_PASSAGE_TOKENS", "600"))
+CONTEXT_MIN_TAIL_TOKENS = 120          # sobra menor que isso não vale um trecho cortado
+CONTEXT_DEDUP_THRESHOLD = 0.6          # fração de shingles já vistos → trecho repetido
+
+BOILERPLATE_PATTERNS = [
+    r"^p[áa]gina\s+\d+(\s+de\s+\d+)?$",
+    r"^\d{1,4}$",
+    r"^[_\-=.\s]{3,}$",
+    r"documento assinado (digitalmente|eletronicamente)",
+    r"^assinatura",
+    r"c[óo]digo verificador",
+    r"^(fone|tel|e-?mail|cep)[:\s]",
+]
+
+_boilerplate = [re.compile(p, re.IGNORECASE) for p in BOILERPLATE_PATTERNS]
+
+# ==================================================
+# 🧹 LIMPEZA E DEDUPLICAÇÃO
+# ==================================================
+
+def is_boilerplate(line: str) -> bool:
+    return any(p.search(line) for p in _boilerplate)
+
+def shingles(text: str, size: int = 8):
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+# ==================================================
+# 📦 EMPACOTAMENTO
+# ==================================================
+
+def pack(passages, budget: int = CONTEXT_TOKEN_BUDGET,
+         passage_tokens: int = CONTEXT_PASSAGE_TOKENS):
+    """
+    passages: [{"header": str, "text": str, "score": float}]
+    Preenche o orçamento de tokens em ordem de score, sem boilerplate,
+    sem linhas já incluídas (cabeçalhos repetidos) e sem trechos
+    sobrepostos, e devolve (contexto, métricas). Os trechos escolhidos
+    saem na ordem original (mantém o agrupamento por RPPS).
+    """
+    order = sorted(range(len(passages)), key=lambda i: -passages[i]["score"])
+
+    seen = set()
+    emitted = set()
+    chosen = {}
+    used = 0
+    stats = {
+        "budget": budget,
+        "passages_in": len(passages),
+        "passages_used": 0,
+        "dropped_duplicate": 0,
+        "dropped_budget": 0,
+        "truncated": 0,
+        "dropped_lines": 0
+    }
+
+    for i in order:
+        p = passages[i]
+
+        lines = []
+        for line in p["text"].splitlines():
+            l = line.strip()
+            if not l:
+                continue
+            if l.lower() in emitted or is_boilerplate(l):
+                stats["dropped_lines"] += 1
+                continue
+            lines.append(l)
+        text = "\n".join(lines)
+
+        sh = shingles(text)
+        if not sh or len(sh & seen) / len(sh) >= CONTEXT_DEDUP_THRESHOLD:
+            stats["dropped_duplicate"] += 1
+            continue
+
+        if count_tokens(text) > passage_tokens:
+            text = truncate_tokens(text, passage_tokens)
+            stats["truncated"] += 1
+
+        block = f"{p['header']}\n{text}" if p.get("header") else text
+        tokens = count_tokens(block) + 2      # separador "\n\n"
+
+        if used + tokens > budget:
+            room = budget - used - count_tokens(p.get("header") or "") - 2
+            if room < CONTEXT_MIN_TAIL_TOKENS:
+                stats["dropped_budget"] += 1
+                continue
+            text = truncate_tokens(text, room)
+            block = f"{p['header']}\n{text}" if p.get("header") else text
+            tokens = count_tokens(block) + 2
+            stats["truncated"] += 1
+
+        chosen[i] = block
+        seen |= sh
+        emitted.update(l.lower() for l in text.splitlines())
+        used += tokens
+
+    stats["passages_used"] = len(chosen)
+    stats["context_tokens"] = used
+
+    context = "\n\n".join(chosen[i] for i in sorted(chosen))
+    return context, stats
+
+# ==================================================
+# 📊 MÉTRICAS AGREGADAS
+# ==================================================
+
+class PromptMetrics:
+    def __init__(self, window: int = 1000):
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=window)
+        self.total_requests = 0
+
+    def record(self, prompt_tokens: int):
+        with self.lock:
+            self.samples.append(prompt_tokens)
+            self.total_requests += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            s = sorted(self.samples)
+            total = self.total_requests
+
+        if not s:
+            return {"requests": total}
+
+        return {
+            "requests": total,
+            "window": len(s),
+            "mean_tokens": round(sum(s) / len(s), 1),
+            "p50_tokens": s[len(s) // 2],
+            "p95_tokens": s[min(len(s) - 1, int(len(s) * 0.95))],
+            "max_tokens": s[-1],
+            "budget": CONTEXT_TOKEN_BUDGET
+        }
+
+PROMPT_METRICS = PromptMetrics()
@@ -0,0 +1,209 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from api.vector_store import EMBEDDINGS_DIR
+from api.llm_client import chat_completion
+
+# ==================================================
+# 🔑 CONFIG
+# ==================================================
+# Digests analíticos por RPPS e por ano, gerados offline:
+#     python -m api.digests
+# Cada digest guarda o hash das atas de origem e só é refeito
+# quando essas atas mudam.
+
+DIGESTS_PATH = os.path.join(EMBEDDINGS_DIR, "digests.json")
+
+DIGEST_DOCS_PER_YEAR = int(os.getenv("DIGEST_DOCS_PER_YEAR", "6"))
+DIGEST_YEARS_IN_PROMPT = int(os.getenv("DIGEST_YEARS_IN_PROMPT", "3"))
+DIGEST_WORKERS = int(os.getenv("DIGEST_WORKERS", "4"))
+
+TOPICS = """
+- seleção e credenciamento de gestores
+- alocação e enquadramento (renda fixa, títulos públicos, renda variável)
+- performance e rentabilidade frente à meta atuarial
+- decisões do comitê de investimentos
+"""
+
+# ==================================================
+# 📂 LEITURA (USADA PELA API)
+# ==================================================
+
+def load_digests():
+    if not os.path.exists(DIGESTS_PATH):
+        return {}
+    return json.load(open(DIGESTS_PATH, encoding="utf-8")).get("rpps", {})
+
+DIGESTS = load_digests()
+
+def digest_block(rpps: str):
+    """Bloco de contexto compacto para o RPPS canônico, ou None."""
+    d = DIGESTS.get(rpps)
+    if not d:
+        return None
+
+    anos = sorted(d["anos"], reverse=True)[:DIGEST_YEARS_IN_PROMPT]
+    partes = [f"[RPPS: {rpps}]", d["geral"]]
+    partes += [f"(Ano: {a}) {d['anos'][a]['digest']}" for a in anos]
+    return "\n".join(partes)
+
+# ==================================================
+# 🔐 HASHES DE ORIGEM
+# ==================================================
+
+def doc_hash(d) -> str:
+    h = hashlib.sha256()
+    h.update(d.get("path", "").encode("utf-8"))
+    h.update(b"\0")
+    h.update(d.get("text", "").encode("utf-8"))
+    return h.hexdigest()
+
+def combined_hash(hashes) -> str:
+    return hashlib.sha256("".join(sorted(hashes)).encode("utf-8")).hexdigest()
+
+# ==================================================
+# 🧠 GERAÇÃO
+# ==================================================
+
+def year_digest(rpps, ano, docs) -> str:
+    context = "\n\n".join(
+        f"(Mês: {d.get('mes') or '?'})\n{d.get('text','')[:1800]}"
+        for d in docs
+    )
+
+    prompt = f"""
+Resuma as atas abaixo do RPPS {rpps} no ano {ano}, em no máximo 8 linhas, cobrindo:
+{TOPICS}
+Utilize exclusivamente os documentos. Omita tópicos sem informação.
+
+DOCUMENTOS:
+{context}
+"""
+
+    return chat_completion(
+        messages=[
+            {"role": "system", "content": "Você é um analista sênior especializado em RPPS."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=350
+    )
+
+def general_digest(rpps, anos) -> str:
+    context = "\n\n".join(f"(Ano: {a}) {anos[a]['digest']}" for a in sorted(anos))
+
+    prompt = f"""
+Com base nos resumos anuais abaixo do RPPS {rpps}, escreva uma síntese de
+no máximo 5 linhas sobre a evolução dos pontos:
+{TOPICS}
+RESUMOS:
+{context}
+"""
+
+    return chat_completion(
+        messages=[
+            {"role": "system", "content": "Você é um analista sênior especializado em RPPS."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=250
+    )
+
+def group_docs(meta, keywords, normalize):
+    """{rpps canônico: {ano: [docs]}} com as atas analíticas."""
+    groups = {}
+
+    for d in meta:
+        ano = d.get("ano")
+        if not ano:
+            continue
+
+        text = d.get("text", "").lower()
+        if not any(k in text for k in keywords):
+            continue
+
+        for r in d.get("rpps", []):
+            canon = normalize(r)
+            if canon:
+                groups.setdefault(canon, {}).setdefault(str(ano), []).append(d)
+
+    return groups
+
+def refresh_rpps(rpps, por_ano, old):
+    old = old or {"anos": {}}
+    anos = {}
+    changed = False
+
+    for ano, docs in por_ano.items():
+        docs = sorted(docs, key=lambda d: d.get("mes") or 0, reverse=True)
+        docs = docs[:DIGEST_DOCS_PER_YEAR]
+        h = combined_hash(doc_hash(d) for d in docs)
+
+        prev = old["anos"].get(ano)
+        if prev and prev["source_hash"] == h:
+            anos[ano] = prev
+            continue
+
+        anos[ano] = {
+            "source_hash": h,
+            "docs": [d.get("path") for d in docs],
+            "digest": year_digest(rpps, ano, docs)
+        }
+        changed = True
+
+    source_hash = combined_hash(a["source_hash"] for a in anos.values())
+    if not changed and old.get("source_hash") == source_hash:
+        return old, False
+
+    return {
+        "source_hash": source_hash,
+        "geral": general_digest(rpps, anos),
+        "anos": anos,
+        "updated_at": datetime.now().isoformat(timespec="seconds")
+    }, True
+
+def save_digests(digests):
+    tmp = f"{DIGESTS_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"rpps": digests}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, DIGESTS_PATH)
+
+def build():
+    # import tardio: só o job offline precisa do motor completo
+    from api.rag_engine import META, ANALYTICAL_KEYWORDS, normalize_rpps_name
+
+    groups = group_docs(META, ANALYTICAL_KEYWORDS, normalize_rpps_name)
+    old = load_digests()
+    digests = {}
+    rebuilt = 0
+
+    print(f"🧾 RPPS com atas analíticas: {len(groups)}")
+
+    with ThreadPoolExecutor(max_workers=DIGEST_WORKERS) as pool:
+        futures = {
+            rpps: pool.submit(refresh_rpps, rpps, por_ano, old.get(rpps))
+            for rpps, por_ano in groups.items()
+        }
+
+        for i, (rpps, fut) in enumerate(futures.items(), start=1):
+            try:
+                digests[rpps], changed = fut.result()
+                rebuilt += changed
+            except Exception as e:
+                print(f"[ERRO] {rpps}: {e}")
+                if rpps in old:
+                    digests[rpps] = old[rpps]
+
+            # salva parcial para não perder trabalho se o job cair
+            if i % 20 == 0:
+                save_digests({**old, **digests})
+                print(f"🔄 Digests {i}/{len(groups)}")
+
+    # RPPS sem atas na metadata atual saem do arquivo
+    save_digests(digests)
+
+    print(f"🎉 Digests prontos: {len(digests)} RPPS ({rebuilt} refeitos)")
+    print(f"📝 Arquivo: {DIGESTS_PATH}")
+
+if __name__ == "__main__":
+    build()
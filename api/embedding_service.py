@@ -0,0 +1,94 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from embeddings.embedder import embed_batch
+
+# ==================================================
+# 🔑 CONFIG
+# ==================================================
+
+EMBED_MICROBATCH = os.getenv("EMBED_MICROBATCH", "1") == "1"
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+
+# ==================================================
+# 🧮 MICRO-BATCHING
+# ==================================================
+
+class MicroBatcher:
+    """
+    Junta embeddings pedidos por requisições concorrentes e roda um único
+    forward pass: espera até max_wait_ms após o primeiro pedido, ou até
+    max_batch pedidos, o que vier antes.
+    """
+
+    def __init__(self, embed_batch_fn, max_wait_ms=EMBED_BATCH_WAIT_MS, max_batch=EMBED_MAX_BATCH):
+        self.embed_batch = embed_batch_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest = 0
+        threading.Thread(target=self._run, name="embed-batcher", daemon=True).start()
+
+    def embed(self, text: str):
+        fut = Future()
+        self.queue.put((text, fut))
+        return fut.result()
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            try:
+                vecs = self.embed_batch([text for text, _ in batch])
+                for (_, fut), vec in zip(batch, vecs):
+                    fut.set_result(vec)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+
+            with self.lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest = max(self.largest, len(batch))
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest,
+                "max_wait_ms": self.max_wait * 1000,
+                "max_batch": self.max_batch
+            }
+
+EMBED_SERVICE = MicroBatcher(embed_batch) if EMBED_MICROBATCH else None
+
+def embed(text: str):
+    if EMBED_SERVICE is None:
+        return embed_batch([text])[0]
+    return EMBED_SERVICE.embed(text)
+
+def stats() -> dict:
+    return EMBED_SERVICE.stats() if EMBED_SERVICE else {"enabled": False}
@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+import openai
+
+# ==================================================
+# 🔑 CONFIG
+# ==================================================
+# Para testar contra um servidor local compatível com a API da OpenAI,
+# basta definir OPENAI_BASE_URL (ex.: http://127.0.0.1:8089/v1).
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))              # requisições por minuto
+LLM_TPM = int(os.getenv("LLM_TPM", "200000"))           # tokens por minuto
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "6"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+
+# os retries passam a ser controlados aqui, não pelo client da OpenAI
+openai.max_retries = 0
+
+# tokenizer do modelo; sem tiktoken (ou offline) cai na aproximação 4 chars/token
+try:
+    import tiktoken
+    _encoding = tiktoken.encoding_for_model(LLM_MODEL)
+except Exception:
+    _encoding = None
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+# ==================================================
+# 🪣 TOKEN BUCKET (ADAPTATIVO)
+# ==================================================
+
+class TokenBucket:
+    """
+    Balde de tokens com capacidade por minuto.
+    Em caso de 429 a taxa cai pela metade; a cada sucesso volta aos poucos.
+    """
+
+    def __init__(self, per_minute: int, min_factor: float = 0.1):
+        self.capacity = float(max(1, per_minute))
+        self.tokens = self.capacity
+        self.factor = 1.0
+        self.min_factor = min_factor
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        rate = self.capacity * self.factor / 60.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Bloqueia até haver tokens. Retorna o tempo esperado (s)."""
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                rate = self.capacity * self.factor / 60.0
+                delay = (amount - self.tokens) / rate
+
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self):
+        with self.lock:
+            self._refill()
+            self.factor = max(self.min_factor, self.factor * 0.5)
+
+    def reward(self):
+        with self.lock:
+            self._refill()
+            self.factor = min(1.0, self.factor + 0.05)
+
+# ==================================================
+# 🔗 SINGLE-FLIGHT (COALESCÊNCIA)
+# ==================================================
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Chamadas concorrentes com a mesma chave compartilham uma única execução.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+        return call.result
+
+# ==================================================
+# 🔁 RETRY COM BACKOFF
+# ==================================================
+
+def retry_after_seconds(error):
+    """Lê Retry-After / retry-after-ms da resposta, se existir."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+
+    return None
+
+def backoff_delay(attempt: int, retry_after=None) -> float:
+    # full jitter, respeitando o mínimo pedido pelo provedor
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+# ==================================================
+# 🧠 CHAT COMPLETION
+# ==================================================
+
+_requests_bucket = TokenBucket(LLM_RPM)
+_tokens_bucket = TokenBucket(LLM_TPM)
+_flight = SingleFlight()
+
+STATS = {
+    "calls": 0,
+    "retries": 0,
+    "rate_limited": 0,
+    "failures": 0,
+    "throttle_wait_s": 0.0,
+}
+_stats_lock = threading.Lock()
+
+def _count(name, value=1):
+    with _stats_lock:
+        STATS[name] += value
+
+def count_tokens(text: str) -> int:
+    if _encoding is None:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text, disallowed_special=()))
+
+def truncate_tokens(text: str, n: int) -> str:
+    if _encoding is None:
+        return text[:n * 4]
+    return _encoding.decode(_encoding.encode(text, disallowed_special=())[:n])
+
+def estimate_tokens(messages, max_tokens: int) -> int:
+    return sum(count_tokens(m.get("content", "")) for m in messages) + max_tokens
+
+def _create_with_retry(model, messages, max_tokens):
+    needed = estimate_tokens(messages, max_tokens)
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        waited = _requests_bucket.acquire(1)
+        waited += _tokens_bucket.acquire(needed)
+        _count("throttle_wait_s", waited)
+        _count("calls")
+
+        try:
+            resp = openai.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens
+            )
+        except RETRYABLE_ERRORS as e:
+            if isinstance(e, openai.RateLimitError):
+                _count("rate_limited")
+                _requests_bucket.penalize()
+                _tokens_bucket.penalize()
+
+            if attempt >= LLM_MAX_RETRIES:
+                _count("failures")
+                raise
+
+            _count("retries")
+            time.sleep(backoff_delay(attempt, retry_after_seconds(e)))
+            continue
+
+        _requests_bucket.reward()
+        _tokens_bucket.reward()
+        return resp.choices[0].message.content.strip()
+
+def chat_completion(messages, max_tokens: int, model: str = LLM_MODEL) -> str:
+    key = hashlib.sha256(
+        json.dumps([model, messages, max_tokens], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+    return _flight.do(key, lambda: _create_with_retry(model, messages, max_tokens))
+
+def stats() -> dict:
+    with _stats_lock:
+        out = dict(STATS)
+    out["coalesced"] = _flight.coalesced
+    out["rpm_factor"] = _requests_bucket.factor
+    out["tpm_factor"] = _tokens_bucket.factor
+    return out
@@ -1,15 +1,69 @@
-from fastapi import FastAPI
-from api.rag_engine import answer
-from pydantic import BaseModel
+import re
 from dotenv import load_dotenv
 load_dotenv()
 
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from api.rag_engine import answer_with_metrics, is_analytical_query, set_audit_gate, SEMANTIC_CACHE
+from api.admission import AdmissionController, AsyncSingleFlight, Overloaded
+from api.context_packer import PROMPT_METRICS
+from api.embedding_service import stats as embedding_stats
+from api.llm_client import stats as llm_stats
+
 app = FastAPI()
 
+# perguntas idênticas e simultâneas compartilham a mesma execução
+ask_flight = AsyncSingleFlight()
+
+# concorrência e fila limitadas por classe de pergunta
+admission = AdmissionController()
+
 class Query(BaseModel):
     pergunta: str
 
+def flight_key(pergunta: str) -> str:
+    return re.sub(r"\s+", " ", pergunta).strip().lower()
+
+def query_class(pergunta: str) -> str:
+    return "analitica" if is_analytical_query(pergunta.lower()) else "generica"
+
+def audit_slot(pergunta: str):
+    # auditorias do cache semântico usam as mesmas vagas, mas nunca esperam
+    cls = query_class(pergunta)
+    if not admission.try_acquire(cls):
+        return None
+    return lambda: admission.release(cls)
+
+set_audit_gate(audit_slot)
+
+async def admitted_answer(pergunta: str):
+    # a espera por vaga fica no event loop; só o trabalho admitido usa thread
+    async with admission.slot(query_class(pergunta)):
+        return await run_in_threadpool(answer_with_metrics, pergunta)
+
 @app.post("/ask")
-def ask(q: Query):
-    resposta = answer(q.pergunta)
-    return {"resposta": resposta}
+async def ask(q: Query):
+    try:
+        # só o líder do single-flight ocupa vaga; os demais esperam por ele
+        resposta, metricas = await ask_flight.do(
+            flight_key(q.pergunta), lambda: admitted_answer(q.pergunta)
+        )
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return {"resposta": resposta, "metricas": metricas}
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "ask_coalesced": ask_flight.coalesced,
+        "admission": admission.stats(),
+        "llm": llm_stats(),
+        "semantic_cache": SEMANTIC_CACHE.stats(),
+        "prompt": PROMPT_METRICS.stats(),
+        "embedding": embedding_stats()
+    }
@@ -1,12 +1,18 @@
 import os
-import json
-import faiss
 import numpy as np
 import re
-import random
+import queue
+import threading
 import openai
 from datetime import datetime
-from embeddings.embedder import embed
+from api.embedding_service import embed
+from embeddings.partitions import detect_ufs
+from api.llm_client import chat_completion, count_tokens
+from api.context_packer import pack, PROMPT_METRICS
+from api.vector_store import SHARDS, META, INDEX_VERSION, search
+from api.digests import digest_block
+from api.rpps_index import top_rpps, RPPS_TOP_N
+from api.semantic_cache import SemanticCache, SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_AUDIT_QUEUE
 
 # 🆕 fuzzy matching
 from rapidfuzz import fuzz
@@ -17,13 +23,6 @@ from rapidfuzz import fuzz
 
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-INDEX_PATH = os.path.join(BASE_DIR, "..", "embeddings", "vector_store.faiss")
-META_PATH = os.path.join(BASE_DIR, "..", "embeddings", "metadata.json")
-
-INDEX = faiss.read_index(INDEX_PATH)
-META = json.load(open(META_PATH, encoding="utf-8"))
-
 CURRENT_YEAR = datetime.now().year
 
 # ==================================================
@@ -45,6 +44,13 @@ RPPS_PATTERNS = [
     r"INSTITUTO DE PREVID[ÊE]NCIA[^\n]{0,80}"
 ]
 
+ANALYTICAL_KEYWORDS = [
+    "gestor", "gestores", "credenciamento", "seleção",
+    "performance", "rentabilidade", "meta atuarial",
+    "alocação", "renda fixa", "títulos", "ltn", "ntn", "lft",
+    "comitê", "estudo", "avaliação", "acompanhamento"
+]
+
 # ==================================================
 # 🆕 NORMALIZAÇÃO CANÔNICA
 # ==================================================
@@ -130,10 +136,10 @@ def is_summary_query(q: str) -> bool:
 # 🔎 BUSCA
 # ==================================================
 
-def semantic_search(query: str, k: int = 40):
-    vec = np.array([embed(query)]).astype("float32")
-    _, idx = INDEX.search(vec, k)
-    return [META[i] for i in idx[0]]
+def semantic_search(query: str, k: int = 40, shards=None, vec=None):
+    if vec is None:
+        vec = np.array([embed(query)]).astype("float32")
+    return search(vec, k, shards)
 
 # ==================================================
 # 🔎 EXTRAÇÕES
@@ -158,14 +164,53 @@ def infer_date_from_text(text: str):
     m = re.search(r"(20\d{2})", text)
     return m.group(1) if m else "data não identificada"
 
+# ==================================================
+# 🧩 ROTEAMENTO DE SHARDS
+# ==================================================
+
+SHARD_RPPS = {
+    name: {normalize_rpps_name(r) for r in shard.rpps}
+    for name, shard in SHARDS.items()
+}
+
+def select_shards(query: str):
+    """
+    Shards relevantes para a pergunta (RPPS citado > UF citada).
+    None = todos.
+    """
+    if len(SHARDS) == 1:
+        return None
+
+    target_rpps = infer_rpps_from_text(query)
+    if target_rpps:
+        names = [
+            name for name, rpps in SHARD_RPPS.items()
+            if any(is_same_rpps(target_rpps[0], r) for r in rpps)
+        ]
+        if names:
+            return names
+
+    ufs = set(detect_ufs(query))
+    if ufs:
+        names = [name for name, shard in SHARDS.items() if shard.ufs & ufs]
+        if names:
+            return names
+
+    return None
+
+def shard_meta(shards):
+    if shards is None:
+        return META
+    return [d for name in shards for d in SHARDS[name].meta]
+
 # ==================================================
 # 🆕 TOP N ATAS POR RPPS (INALTERADO)
 # ==================================================
 
-def get_top_docs_for_rpps(rpps_name, keywords, limit):
+def get_top_docs_for_rpps(rpps_name, keywords, limit, meta=None):
     docs = []
 
-    for d in META:
+    for d in (META if meta is None else meta):
         meta_rpps = [
             normalize_rpps_name(r)
             for r in d.get("rpps", [])
@@ -188,12 +233,113 @@ def get_top_docs_for_rpps(rpps_name, keywords, limit):
     docs.sort(key=lambda x: x.get("ano", 0), reverse=True)
     return docs[:limit]
 
+# ==================================================
+# 💾 CACHE SEMÂNTICO
+# ==================================================
+
+SEMANTIC_CACHE = SemanticCache()
+
+def cache_key(query: str):
+    ql = query.lower()
+    return (
+        tuple(infer_rpps_from_text(query)),
+        tuple(detect_ufs(query)),
+        is_analytical_query(ql),
+        is_summary_query(ql),
+        INDEX_VERSION
+    )
+
+# uma única thread audita; pedidos além da fila curta são descartados
+AUDIT_QUEUE = queue.Queue(maxsize=SEMANTIC_CACHE_AUDIT_QUEUE)
+
+def _no_gate(query):
+    return lambda: None
+
+_audit_gate = _no_gate
+
+def set_audit_gate(gate):
+    """
+    gate(query) devolve a função que libera a vaga, ou None se não há vaga;
+    a API usa o controle de admissão para as auditorias contarem nos limites.
+    """
+    global _audit_gate
+    _audit_gate = gate
+
+def audit_worker():
+    while True:
+        query, qvec, cached = AUDIT_QUEUE.get()
+        release = _audit_gate(query)
+        if release is None:
+            SEMANTIC_CACHE.record_audit_dropped()
+            continue
+        try:
+            audit_cached(query, qvec, cached)
+        finally:
+            release()
+
+if SEMANTIC_CACHE_ENABLED:
+    threading.Thread(target=audit_worker, name="cache-audit", daemon=True).start()
+
+def audit_cached(query, qvec, cached):
+    """Recalcula a resposta de um hit e compara com a do cache."""
+    try:
+        fresh, _ = compute_answer(query, qvec)
+        a = np.array([embed(cached), embed(fresh)], dtype="float32")
+        a /= np.linalg.norm(a, axis=1, keepdims=True)
+        SEMANTIC_CACHE.record_audit(float(a[0] @ a[1]))
+    except Exception as e:
+        print(f"[CACHE] Falha na auditoria: {e}")
+
 # ==================================================
 # 🧠 ANSWER
 # ==================================================
 
 def answer(query: str) -> str:
+    return answer_with_metrics(query)[0]
+
+def answer_with_metrics(query: str):
+    """Resposta + métricas do prompt (tokens, trechos usados/descartados)."""
+    qvec = np.array([embed(query)]).astype("float32")
+
+    if not SEMANTIC_CACHE_ENABLED:
+        return compute_answer(query, qvec)
+
+    key = cache_key(query)
+    cached = SEMANTIC_CACHE.lookup(qvec, key)
+    if cached is not None:
+        if SEMANTIC_CACHE.should_audit():
+            try:
+                AUDIT_QUEUE.put_nowait((query, qvec, cached))
+            except queue.Full:
+                SEMANTIC_CACHE.record_audit_dropped()
+        return cached, {"branch": "cache", "prompt_tokens": 0}
+
+    resposta, metrics = compute_answer(query, qvec)
+    SEMANTIC_CACHE.store(qvec, key, resposta)
+    return resposta, metrics
+
+def ask_llm(system, prompt, max_tokens, branch, pack_stats):
+    prompt_tokens = count_tokens(system) + count_tokens(prompt)
+    PROMPT_METRICS.record(prompt_tokens)
+
+    resposta = chat_completion(
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=max_tokens
+    )
+
+    return resposta, {
+        "branch": branch,
+        "prompt_tokens": prompt_tokens,
+        **pack_stats
+    }
+
+def compute_answer(query: str, qvec):
     ql = query.lower()
+    shards = select_shards(query)
+    meta = shard_meta(shards)
 
     if is_analytical_query(ql):
 
@@ -205,64 +351,81 @@ def answer(query: str) -> str:
         alocação diretrizes estudo acompanhamento
         """
 
-        _ = semantic_search(expansion + " " + query)
+        _ = semantic_search(expansion + " " + query, shards=shards)
 
-        keywords = [
-            "gestor", "gestores", "credenciamento", "seleção",
-            "performance", "rentabilidade", "meta atuarial",
-            "alocação", "renda fixa", "títulos", "ltn", "ntn", "lft",
-            "comitê", "estudo", "avaliação", "acompanhamento"
-        ]
+        keywords = ANALYTICAL_KEYWORDS
 
         target_rpps = infer_rpps_from_text(query)
-        blocks = []
+        passages = []
 
         # --------------------------------------------------
         # 🔹 RPPS ESPECÍFICO → TOP 8
         # --------------------------------------------------
         if target_rpps:
             rpps = target_rpps[0]
-            docs = get_top_docs_for_rpps(rpps, keywords, limit=8)
+            docs = get_top_docs_for_rpps(rpps, keywords, limit=8, meta=meta)
+            branch = "rpps_especifico"
 
-            for d in docs:
-                blocks.append(
-                    f"[RPPS: {rpps}]\n(Ano: {d.get('ano')})\n{d.get('text','')[:1800]}"
-                )
+            for j, d in enumerate(docs):
+                passages.append({
+                    "header": f"[RPPS: {rpps}]\n(Ano: {d.get('ano')})",
+                    "text": d.get("text", ""),
+                    "score": -j
+                })
 
         # --------------------------------------------------
-        # 🔹 PERGUNTA ABERTA → TOP 5 POR RPPS
+        # 🔹 PERGUNTA ABERTA → DIGEST OU TOP 5 POR RPPS
         # --------------------------------------------------
         else:
-            all_rpps = set()
-            for m in META:
-                for r in m.get("rpps", []):
-                    all_rpps.add(normalize_rpps_name(r))
-
-            all_rpps = list(all_rpps)
-            random.shuffle(all_rpps)
-
+            branch = "pergunta_aberta"
+            rpps_in_scope = None
+            if shards is not None:
+                rpps_in_scope = {
+                    normalize_rpps_name(r)
+                    for m in meta for r in m.get("rpps", [])
+                }
+
+            # centróides (api/rpps_index.py): institutos mais próximos da pergunta
+            all_rpps = top_rpps(qvec, RPPS_TOP_N, rpps_in_scope)
+
+            if not all_rpps:
+                all_rpps = rpps_in_scope or {
+                    normalize_rpps_name(r)
+                    for m in meta for r in m.get("rpps", [])
+                }
+                # ordem estável: mesma pergunta, mesmo contexto
+                all_rpps = sorted(all_rpps)
+
+            n_rpps = 0
             for rpps in all_rpps:
-                docs = get_top_docs_for_rpps(rpps, keywords, limit=5)
-                if not docs:
-                    continue
-
-                joined = "\n\n".join(
-                    f"(Ano: {d.get('ano')})\n{d.get('text','')[:1200]}"
-                    for d in docs
-                )
-
-                blocks.append(f"[RPPS: {rpps}]\n{joined}")
-
-                if len(blocks) >= 20:
+                # digest pré-computado (api/digests.py) evita varrer a metadata
+                digest = digest_block(rpps)
+                if digest:
+                    passages.append({"header": "", "text": digest, "score": -n_rpps})
+                else:
+                    docs = get_top_docs_for_rpps(rpps, keywords, limit=5, meta=meta)
+                    if not docs:
+                        continue
+
+                    # 1ª ata de cada RPPS antes da 2ª de qualquer um
+                    for j, d in enumerate(docs):
+                        passages.append({
+                            "header": f"[RPPS: {rpps}]\n(Ano: {d.get('ano')})",
+                            "text": d.get("text", ""),
+                            "score": -(j * 1000 + n_rpps)
+                        })
+
+                n_rpps += 1
+                if n_rpps >= RPPS_TOP_N:
                     break
 
-        if not blocks:
+        if not passages:
             return (
                 "Os documentos analisados não apresentam informações "
                 "suficientes e recentes relacionadas à pergunta."
-            )
+            ), {"branch": branch, "prompt_tokens": 0}
 
-        context = "\n\n".join(blocks)
+        context, pack_stats = pack(passages)
 
         prompt = f"""
 Você é um analista sênior especializado em RPPS.
@@ -279,23 +442,20 @@ PERGUNTA:
 {query}
 """
 
-        resp = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Analise exclusivamente os documentos fornecidos."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=900
+        return ask_llm(
+            "Analise exclusivamente os documentos fornecidos.",
+            prompt, 900, branch, pack_stats
         )
 
-        return resp.choices[0].message.content.strip()
-
     # --------------------------------------------------
-    # 🔹 OUTROS MODOS (INALTERADOS)
+    # 🔹 OUTROS MODOS
     # --------------------------------------------------
 
-    docs = semantic_search(query, k=8)
-    context = "\n\n".join(d.get("text", "")[:2500] for d in docs)
+    docs = semantic_search(query, k=8, shards=shards, vec=qvec)
+    context, pack_stats = pack([
+        {"header": "", "text": d.get("text", ""), "score": -j}
+        for j, d in enumerate(docs)
+    ])
 
     prompt = f"""
 Você é um analista especializado em atas de RPPS.
@@ -307,13 +467,7 @@ PERGUNTA:
 {query}
 """
 
-    resp = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "Responda com base nos documentos."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=700
+    return ask_llm(
+        "Responda com base nos documentos.",
+        prompt, 700, "generica", pack_stats
     )
-
-    return resp.choices[0].message.content.strip()
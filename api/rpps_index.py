@@ -0,0 +1,129 @@
+import os
+import json
+import argparse
+import faiss
+import numpy as np
+from api.vector_store import EMBEDDINGS_DIR
+
+# ==================================================
+# 🔑 CONFIG
+# ==================================================
+# Índice pequeno com um centróide por RPPS canônico (ou por RPPS + ano),
+# usado nas perguntas abertas para escolher os institutos mais relevantes.
+# Gerado offline depois do build_index:
+#     python -m api.rpps_index [--by-year]
+
+CENTROIDS_INDEX_PATH = os.path.join(EMBEDDINGS_DIR, "rpps_centroids.faiss")
+CENTROIDS_META_PATH = os.path.join(EMBEDDINGS_DIR, "rpps_centroids.json")
+
+RPPS_TOP_N = int(os.getenv("RPPS_TOP_N", "20"))
+
+RECONSTRUCT_BATCH = 10000
+
+# ==================================================
+# 📂 LEITURA (USADA PELA API)
+# ==================================================
+
+def load_centroids():
+    if not (os.path.exists(CENTROIDS_INDEX_PATH) and os.path.exists(CENTROIDS_META_PATH)):
+        return None, []
+    index = faiss.read_index(CENTROIDS_INDEX_PATH)
+    keys = json.load(open(CENTROIDS_META_PATH, encoding="utf-8"))["keys"]
+    return index, keys
+
+CENTROIDS, CENTROID_KEYS = load_centroids()
+
+def top_rpps(qvec, n: int = RPPS_TOP_N, allowed=None):
+    """
+    RPPS canônicos mais próximos da pergunta, em ordem de relevância.
+    allowed restringe aos RPPS dos shards selecionados.
+    """
+    if CENTROIDS is None or not CENTROIDS.ntotal:
+        return []
+
+    v = np.asarray(qvec, dtype="float32").reshape(1, -1).copy()
+    faiss.normalize_L2(v)
+
+    # por ano há várias entradas por RPPS; com filtro, busca mais fundo
+    depth = n * 3 if allowed is None else n * 10
+    _, ids = CENTROIDS.search(v, min(depth, CENTROIDS.ntotal))
+
+    out = []
+    for i in ids[0]:
+        if i < 0:
+            continue
+        rpps = CENTROID_KEYS[i]["rpps"]
+        if rpps in out or (allowed is not None and rpps not in allowed):
+            continue
+        out.append(rpps)
+        if len(out) >= n:
+            break
+
+    return out
+
+# ==================================================
+# 🏗️ BUILD
+# ==================================================
+
+def build(by_year=False):
+    # import tardio: só o job offline precisa do motor completo
+    from api.vector_store import SHARDS
+    from api.rag_engine import ANALYTICAL_KEYWORDS, normalize_rpps_name
+
+    sums = {}
+    counts = {}
+
+    for shard in SHARDS.values():
+        total = shard.index.ntotal
+        for start in range(0, total, RECONSTRUCT_BATCH):
+            end = min(start + RECONSTRUCT_BATCH, total)
+            vecs = shard.index.reconstruct_n(start, end - start).astype("float32")
+            faiss.normalize_L2(vecs)
+
+            for j, d in enumerate(shard.meta[start:end]):
+                # mesmos critérios de get_top_docs_for_rpps
+                if not d.get("ano"):
+                    continue
+                text = d.get("text", "").lower()
+                if not any(k in text for k in ANALYTICAL_KEYWORDS):
+                    continue
+
+                for r in {normalize_rpps_name(r) for r in d.get("rpps", [])}:
+                    if not r:
+                        continue
+                    key = (r, d["ano"] if by_year else None)
+                    if key not in sums:
+                        sums[key] = np.zeros(vecs.shape[1], dtype="float32")
+                        counts[key] = 0
+                    sums[key] += vecs[j]
+                    counts[key] += 1
+
+    if not sums:
+        raise RuntimeError("❌ Nenhum RPPS com atas analíticas na metadata.")
+
+    keys = sorted(sums, key=lambda k: (k[0], k[1] or 0))
+    arr = np.vstack([sums[k] / counts[k] for k in keys]).astype("float32")
+    faiss.normalize_L2(arr)
+
+    index = faiss.IndexFlatIP(arr.shape[1])
+    index.add(arr)
+    faiss.write_index(index, CENTROIDS_INDEX_PATH)
+
+    with open(CENTROIDS_META_PATH, "w", encoding="utf-8") as f:
+        json.dump({
+            "by_year": by_year,
+            "keys": [
+                {"rpps": r, "ano": ano, "docs": counts[(r, ano)]}
+                for r, ano in keys
+            ]
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"🎯 Centróides: {len(keys)} ({len({k[0] for k in keys})} RPPS)")
+    print(f"📦 FAISS: {CENTROIDS_INDEX_PATH}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de centróides por RPPS.")
+    parser.add_argument("--by-year", action="store_true", help="um centróide por RPPS e ano")
+    args = parser.parse_args()
+
+    build(args.by_year)
@@ -0,0 +1,114 @@
+import os
+import random
+import threading
+import faiss
+import numpy as np
+
+# ==================================================
+# 🔑 CONFIG
+# ==================================================
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "2000"))
+# fração dos hits recalculada em background para medir falsos hits
+SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05"))
+# auditorias pendentes; com a fila cheia, a auditoria é descartada
+SEMANTIC_CACHE_AUDIT_QUEUE = int(os.getenv("SEMANTIC_CACHE_AUDIT_QUEUE", "4"))
+SEMANTIC_CACHE_AUDIT_MIN_SIM = float(os.getenv("SEMANTIC_CACHE_AUDIT_MIN_SIM", "0.90"))
+
+# ==================================================
+# 🧠 CACHE SEMÂNTICO
+# ==================================================
+
+def normalized(vec):
+    v = np.asarray(vec, dtype="float32").reshape(1, -1).copy()
+    faiss.normalize_L2(v)
+    return v
+
+class SemanticCache:
+    """
+    Respostas indexadas pelo embedding da pergunta (cosseno via IndexFlatIP).
+    Um hit exige similaridade >= threshold E a mesma chave
+    (RPPS, intenção, UFs e versão do índice).
+    """
+
+    def __init__(self, dim=768, threshold=SEMANTIC_CACHE_THRESHOLD,
+                 max_entries=SEMANTIC_CACHE_SIZE, audit_rate=SEMANTIC_CACHE_AUDIT_RATE):
+        self.dim = dim
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.audit_rate = audit_rate
+        self.lock = threading.Lock()
+        self.index = faiss.IndexFlatIP(dim)
+        self.entries = []
+        self.vectors = []
+        self.counters = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "key_mismatch": 0,   # pergunta parecida, mas RPPS/intenção diferente
+            "audits": 0,
+            "audits_dropped": 0,  # fila cheia ou sem vaga na admissão
+            "false_hits": 0
+        }
+
+    def lookup(self, vec, key):
+        v = normalized(vec)
+
+        with self.lock:
+            self.counters["lookups"] += 1
+
+            if self.index.ntotal:
+                scores, ids = self.index.search(v, min(5, self.index.ntotal))
+                for score, i in zip(scores[0], ids[0]):
+                    if i < 0 or score < self.threshold:
+                        break
+                    entry = self.entries[i]
+                    if entry["key"] == key:
+                        self.counters["hits"] += 1
+                        return entry["answer"]
+                    self.counters["key_mismatch"] += 1
+
+            self.counters["misses"] += 1
+            return None
+
+    def store(self, vec, key, answer):
+        v = normalized(vec)
+
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                # descarta a metade mais antiga e reconstrói o índice
+                keep = self.max_entries // 2
+                self.entries = self.entries[-keep:]
+                self.vectors = self.vectors[-keep:]
+                self.index.reset()
+                if self.vectors:
+                    self.index.add(np.vstack(self.vectors))
+
+            self.entries.append({"key": key, "answer": answer})
+            self.vectors.append(v)
+            self.index.add(v)
+
+    def should_audit(self) -> bool:
+        return random.random() < self.audit_rate
+
+    def record_audit(self, similarity: float):
+        with self.lock:
+            self.counters["audits"] += 1
+            if similarity < SEMANTIC_CACHE_AUDIT_MIN_SIM:
+                self.counters["false_hits"] += 1
+
+    def record_audit_dropped(self):
+        with self.lock:
+            self.counters["audits_dropped"] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            out = dict(self.counters)
+            out["entries"] = len(self.entries)
+
+        out["hit_rate"] = round(out["hits"] / out["lookups"], 4) if out["lookups"] else 0.0
+        out["false_hit_rate"] = round(out["false_hits"] / out["audits"], 4) if out["audits"] else None
+        out["threshold"] = self.threshold
+        return out
@@ -0,0 +1,102 @@
+import os
+import json
+import heapq
+import hashlib
+import faiss
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# ==================================================
+# 🔑 CONFIG
+# ==================================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EMBEDDINGS_DIR = os.getenv(
+    "RAG_EMBEDDINGS_DIR",
+    os.path.join(BASE_DIR, "..", "embeddings")
+)
+
+INDEX_PATH = os.path.join(EMBEDDINGS_DIR, "vector_store.faiss")
+META_PATH = os.path.join(EMBEDDINGS_DIR, "metadata.json")
+SHARDS_DIR = os.path.join(EMBEDDINGS_DIR, "shards")
+MANIFEST_PATH = os.path.join(SHARDS_DIR, "manifest.json")
+
+SEARCH_WORKERS = int(os.getenv("RAG_SEARCH_WORKERS", "8"))
+
+# ==================================================
+# 🧩 SHARDS
+# ==================================================
+
+class Shard:
+    def __init__(self, name, index_path, meta_path):
+        self.name = name
+        self.index = faiss.read_index(index_path)
+        self.meta = json.load(open(meta_path, encoding="utf-8"))
+        self.ufs = {d.get("uf") for d in self.meta if d.get("uf")}
+        self.rpps = {r for d in self.meta for r in d.get("rpps", [])}
+
+    def search(self, vec, k):
+        dist, idx = self.index.search(vec, min(k, self.index.ntotal))
+        return [
+            (float(dist[0][j]), self.meta[i])
+            for j, i in enumerate(idx[0])
+            if i >= 0
+        ]
+
+def load_shards():
+    """
+    Usa embeddings/shards/manifest.json se existir (um build plano o
+    renomeia); caso contrário, o índice único vira um shard "all".
+    """
+    if not os.path.exists(MANIFEST_PATH):
+        return {"all": Shard("all", INDEX_PATH, META_PATH)}
+
+    manifest = json.load(open(MANIFEST_PATH, encoding="utf-8"))
+    shards = {}
+    for name in sorted(manifest["shards"]):
+        shard_dir = os.path.join(SHARDS_DIR, name)
+        shards[name] = Shard(
+            name,
+            os.path.join(shard_dir, "vector_store.faiss"),
+            os.path.join(shard_dir, "metadata.json")
+        )
+
+    print(f"[VECTOR STORE] {len(shards)} shards por '{manifest['partition_key']}'")
+    return shards
+
+def index_version() -> str:
+    """Muda sempre que índice, metadata, manifest ou digests são regravados."""
+    h = hashlib.sha256()
+    for root, _, files in os.walk(EMBEDDINGS_DIR):
+        for f in sorted(files):
+            if f.endswith((".faiss", ".json")):
+                st = os.stat(os.path.join(root, f))
+                h.update(f"{root}/{f}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+SHARDS = load_shards()
+META = [d for s in SHARDS.values() for d in s.meta]
+INDEX_VERSION = index_version()
+
+_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS)
+
+# ==================================================
+# 🔎 BUSCA (FAN-OUT)
+# ==================================================
+
+def search(vec, k: int, shard_names=None):
+    """
+    Busca em paralelo nos shards escolhidos e junta o top-k (menor distância L2).
+    """
+    vec = np.asarray(vec, dtype="float32").reshape(1, -1)
+    names = shard_names or list(SHARDS)
+    shards = [SHARDS[n] for n in names if n in SHARDS]
+
+    if len(shards) == 1:
+        hits = shards[0].search(vec, k)
+    else:
+        hits = []
+        for part in _pool.map(lambda s: s.search(vec, k), shards):
+            hits.extend(part)
+
+    return [d for _, d in heapq.nsmallest(k, hits, key=lambda h: h[0])]
@@ -0,0 +1,107 @@
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# --------------------------------------------------
+# BENCHMARK: EMBEDDING DIRETO × MICRO-BATCHING
+# --------------------------------------------------
+# Mede p50/p99 e throughput de embeddings de perguntas com N clientes
+# concorrentes, chamando o modelo um a um ou pelo MicroBatcher. Uso:
+#     python -m bench.bench_microbatch --concurrency 1 4 16 64
+#     python -m bench.bench_microbatch --fake    (custo simulado, sem modelo)
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+QUESTIONS = [
+    "Como foi o processo de seleção de gestores do IPREBLUMENAU?",
+    "Qual a alocação em títulos públicos do IPRELONDRINA em 2023?",
+    "Resuma a política de investimentos do IPRECANOAS.",
+    "Quais RPPS atingiram a meta atuarial?",
+    "Como o comitê avaliou a performance dos fundos de renda fixa?",
+    "Quais gestores foram credenciados em Santa Catarina?",
+]
+
+def fake_embed_batch(base_ms, per_item_ms):
+    """Simula um forward pass: custo fixo + custo por item, serializado."""
+    from bench.fake_embedder import embed
+    lock = threading.Lock()
+
+    def embed_batch(texts):
+        with lock:
+            time.sleep((base_ms + per_item_ms * len(texts)) / 1000.0)
+        return [embed(t) for t in texts]
+
+    return embed_batch
+
+def run_level(embed_fn, concurrency, requests):
+    latencies = []
+    lock = threading.Lock()
+
+    def one(i):
+        t0 = time.perf_counter()
+        embed_fn(f"{QUESTIONS[i % len(QUESTIONS)]} #{i}")
+        dt = time.perf_counter() - t0
+        with lock:
+            latencies.append(dt)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - t0
+
+    ms = sorted(l * 1000 for l in latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "p50_ms": round(ms[len(ms) // 2], 2),
+        "p99_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.99))], 2),
+        "mean_ms": round(statistics.mean(ms), 2),
+        "throughput_rps": round(requests / wall, 2)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding direto × micro-batching.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="pedidos por nível")
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--fake", action="store_true", help="custo simulado em vez do modelo E5")
+    parser.add_argument("--fake-base-ms", type=float, default=40.0)
+    parser.add_argument("--fake-item-ms", type=float, default=4.0)
+    args = parser.parse_args()
+
+    if args.fake:
+        from bench import fake_embedder
+        fake_embedder.install()
+        embed_batch = fake_embed_batch(args.fake_base_ms, args.fake_item_ms)
+    else:
+        from embeddings.embedder import embed_batch
+
+    from api.embedding_service import MicroBatcher
+    batcher = MicroBatcher(embed_batch, args.wait_ms, args.max_batch)
+
+    modes = {
+        "direto": lambda text: embed_batch([text])[0],
+        "micro_batch": batcher.embed,
+    }
+
+    result = {
+        "model": "fake" if args.fake else "e5",
+        "wait_ms": args.wait_ms,
+        "max_batch": args.max_batch,
+        "results": {}
+    }
+    for name, fn in modes.items():
+        fn(QUESTIONS[0])  # aquecimento
+        result["results"][name] = [
+            run_level(fn, c, max(args.requests, c)) for c in args.concurrency
+        ]
+    result["batcher"] = batcher.stats()
+
+    print(json.dumps(result, ensure_ascii=False))
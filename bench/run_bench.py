@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import statistics
+import contextlib
+from datetime import datetime
+from pathlib import Path
+
+# --------------------------------------------------
+# BENCHMARK PONTA A PONTA (OFFLINE)
+# --------------------------------------------------
+# Gera um corpus sintético num diretório temporário, roda
+# ingest → prepare → build, carrega o índice e mede answer() por ramo
+# com embedder falso e LLM stub local. Uso:
+#     python -m bench.run_bench --docs 500 --out bench_results.jsonl
+
+REPO = Path(__file__).resolve().parent.parent
+
+QUERIES = {
+    "rpps_especifico": "Como foi o processo de seleção de gestores do {rpps}?",
+    "pergunta_aberta": "Como os institutos avaliam a performance dos gestores frente à meta atuarial?",
+    "generica": "Quais assuntos foram tratados nas reuniões do conselho deliberativo?",
+}
+
+def rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(fn, n_items=None):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    out = {
+        "seconds": round(seconds, 4),
+        "peak_alloc_mb": round(peak / 2**20, 2),
+        "rss_mb": round(rss_mb(), 1)
+    }
+    if n_items:
+        out["items"] = n_items
+        out["items_per_s"] = round(n_items / seconds, 2) if seconds else None
+    return out
+
+def percentiles(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.mean(ms), 2),
+        "p50_ms": round(ms[len(ms) // 2], 2),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 2),
+        "max_ms": round(ms[-1], 2)
+    }
+
+def count_files(root, suffix):
+    return sum(1 for _ in Path(root).rglob(f"*{suffix}"))
+
+def run(args):
+    from bench import synthetic_corpus, fake_embedder, stub_llm
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="rag_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+
+    fake_embedder.install()
+    sys.path[:0] = [str(REPO / "ingest"), str(REPO / "embeddings"), str(REPO)]
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "docs": args.docs,
+        "seed": args.seed,
+        "shard_by": args.shard_by,
+        "embed_microbatch": args.microbatch,
+        "workdir": str(workdir),
+        "stages": {},
+        "answer": {}
+    }
+    stages = result["stages"]
+
+    # 1️⃣ corpus
+    fmt = "txt" if args.skip_ingest else "pdf"
+    holder = {}
+    stages["generate"] = measure(
+        lambda: holder.update(rpps=synthetic_corpus.generate(workdir, args.docs, args.seed, fmt=fmt)),
+        args.docs
+    )
+    rpps = holder["rpps"]
+
+    # 2️⃣ ingest
+    if not args.skip_ingest:
+        import ingest_all
+        stages["ingest"] = measure(ingest_all.main, args.docs)
+
+    # 3️⃣ prepare
+    import prepare_txt
+    stages["prepare"] = measure(prepare_txt.process_all, count_files("data/raw_txt", ".txt"))
+
+    # 4️⃣ build
+    import build_index
+    stages["build"] = measure(
+        lambda: build_index.build(args.shard_by),
+        count_files(build_index.TXT_ROOT, ".txt")
+    )
+
+    # 5️⃣ carga do índice + answer()
+    server, stub, base_url = stub_llm.start(latency_ms=args.llm_latency_ms)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["RAG_EMBEDDINGS_DIR"] = str(workdir / "embeddings")
+    # mede o caminho completo; o cache semântico responderia as repetições
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "0"
+    # fixo no resultado: com micro-batch cada pergunta espera a janela do batcher
+    os.environ["EMBED_MICROBATCH"] = "1" if args.microbatch else "0"
+
+    t0 = time.perf_counter()
+    from api import rag_engine, vector_store, rpps_index
+    result["stages"]["api_import"] = {"seconds": round(time.perf_counter() - t0, 4)}
+    stages["index_load"] = measure(vector_store.load_shards, len(vector_store.META))
+
+    if not args.no_centroids:
+        stages["centroids"] = measure(rpps_index.build, len(vector_store.META))
+        rpps_index.CENTROIDS, rpps_index.CENTROID_KEYS = rpps_index.load_centroids()
+
+    for branch, template in QUERIES.items():
+        query = template.format(rpps=rpps[0])
+        samples = []
+        tokens = []
+        taken = {}
+        for _ in range(args.repeats):
+            t0 = time.perf_counter()
+            _, metrics = rag_engine.answer_with_metrics(query)
+            samples.append(time.perf_counter() - t0)
+            tokens.append(metrics.get("prompt_tokens", 0))
+            taken[metrics["branch"]] = taken.get(metrics["branch"], 0) + 1
+        if set(taken) != {branch}:
+            print(f"⚠️ '{branch}' caiu em outro ramo: {taken}")
+        result["answer"][branch] = {
+            **percentiles(samples),
+            "prompt_tokens": round(statistics.mean(tokens), 1),
+            "branches_taken": taken
+        }
+
+    result["branches_ok"] = all(
+        set(r["branches_taken"]) == {b} for b, r in result["answer"].items()
+    )
+
+    result["llm_stub"] = {
+        "requests": stub.requests,
+        "avg_prompt_chars": round(stub.prompt_chars / stub.requests, 1) if stub.requests else 0
+    }
+    result["rss_mb_final"] = round(rss_mb(), 1)
+
+    server.shutdown()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline RAG.")
+    parser.add_argument("--docs", type=int, default=300, help="atas sintéticas a gerar")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=20, help="execuções de answer() por ramo")
+    parser.add_argument("--shard-by", default="none", choices=("none", "uf", "municipio"))
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--no-centroids", action="store_true", help="perguntas abertas sem rpps_index")
+    parser.add_argument("--microbatch", action="store_true", help="embeddings de pergunta via MicroBatcher")
+    parser.add_argument("--skip-ingest", action="store_true", help="gera TXT direto (sem PyMuPDF)")
+    parser.add_argument("--workdir", help="diretório de trabalho (padrão: temporário)")
+    parser.add_argument("--out", help="acrescenta o resultado (JSON lines) neste arquivo")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out) if args.out else None
+
+    # logs das etapas vão para stderr; stdout fica só com o JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        result = run(args)
+
+    line = json.dumps(result, ensure_ascii=False)
+    print(line)
+    if out:
+        with open(out, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    # medição de um ramo que não rodou não vale: falha para o CI perceber
+    if not result["branches_ok"]:
+        sys.exit(1)
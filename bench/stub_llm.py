@@ -0,0 +1,105 @@
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --------------------------------------------------
+# SERVIDOR LLM STUB (COMPATÍVEL COM A API DA OPENAI)
+# --------------------------------------------------
+# Responde POST /v1/chat/completions com latência fixa e, opcionalmente,
+# uma fração de 429 com Retry-After. Uso:
+#     python -m bench.stub_llm --port 8089 --latency-ms 300
+#     OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub ...
+
+class StubState:
+    def __init__(self, latency_ms=0.0, error_rate=0.0, retry_after=1):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rate_limited = 0
+        self.prompt_chars = 0
+        self.lock = threading.Lock()
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            req = json.loads(self.rfile.read(length) or b"{}")
+
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}})
+                return
+
+            if random.random() < state.error_rate:
+                with state.lock:
+                    state.rate_limited += 1
+                self._send(
+                    429,
+                    {"error": {"message": "rate limited (stub)", "type": "rate_limit_error"}},
+                    {"Retry-After": str(state.retry_after)}
+                )
+                return
+
+            chars = sum(len(m.get("content", "")) for m in req.get("messages", []))
+            with state.lock:
+                state.requests += 1
+                state.prompt_chars += chars
+
+            time.sleep(state.latency_ms / 1000.0)
+
+            content = f"Resposta stub ({chars} caracteres de prompt)."
+            self._send(200, {
+                "id": f"stub-{state.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": req.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": chars // 4,
+                    "completion_tokens": len(content) // 4,
+                    "total_tokens": (chars + len(content)) // 4
+                }
+            })
+
+    return Handler
+
+def start(port: int = 0, latency_ms: float = 0.0, error_rate: float = 0.0):
+    """Sobe o stub em uma thread; retorna (server, state, base_url)."""
+    state = StubState(latency_ms, error_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM stub compatível com a OpenAI.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 429")
+    args = parser.parse_args()
+
+    server, _, url = start(args.port, args.latency_ms, args.error_rate)
+    print(f"🤖 LLM stub em {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
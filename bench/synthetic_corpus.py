@@ -0,0 +1,111 @@
+import random
+from pathlib import Path
+
+# --------------------------------------------------
+# CORPUS SINTÉTICO DE ATAS
+# --------------------------------------------------
+# Gera data/<UF>/<Municipio>/*.pdf com atas fictícias de RPPS
+# (comitê de investimentos, conselhos, administrativas).
+
+MUNICIPIOS = {
+    "SC": ["Antonio_Carlos", "Blumenau", "Chapeco", "Joinville", "Lages"],
+    "PR": ["Cascavel", "Londrina", "Maringa", "Toledo"],
+    "RS": ["Canoas", "Pelotas", "Santa_Maria"],
+    "SP": ["Bauru", "Franca", "Marilia", "Sorocaba"],
+}
+
+MESES = [
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro"
+]
+
+GESTORES = [
+    "BB Gestão de Recursos DTVM", "Caixa Asset", "Itaú Asset",
+    "Bradesco Asset", "Santander Asset", "XP Investimentos"
+]
+
+FRASES_INVEST = [
+    "O comitê de investimentos analisou a carteira frente à meta atuarial de IPCA + {taxa}% ao ano.",
+    "Foi aprovado o credenciamento do gestor {gestor} após análise do processo de seleção.",
+    "A rentabilidade acumulada no mês foi de {rent}%, contra meta atuarial de {meta}%.",
+    "Deliberou-se pela alocação de {pct}% do patrimônio em títulos públicos federais (NTN-B e LTN).",
+    "A política de investimentos prevê limite de {pct}% em renda variável.",
+    "A performance dos fundos de renda fixa foi acompanhada com base no estudo de ALM.",
+    "O presidente apresentou a avaliação dos gestores e o relatório de acompanhamento da carteira.",
+    "Os membros decidiram resgatar R$ {valor} mil do fundo {gestor} e aplicar em LFT.",
+]
+
+FRASES_ADMIN = [
+    "Foi lida e aprovada a ata da reunião anterior.",
+    "Tratou-se da concessão de aposentadorias e pensões do período.",
+    "O conselho deliberativo discutiu o orçamento administrativo do instituto.",
+    "Foram apresentados os processos de compensação previdenciária.",
+    "Nada mais havendo a tratar, encerrou-se a reunião.",
+]
+
+def rpps_for(municipio: str) -> str:
+    letters = "".join(c for c in municipio.upper() if c.isalpha())
+    return "IPRE" + letters[:8]
+
+def ata_text(rng: random.Random, rpps: str, municipio: str, ano: int, investimentos: bool) -> str:
+    mes = rng.choice(MESES)
+    linhas = [
+        f"INSTITUTO DE PREVIDÊNCIA DOS SERVIDORES PÚBLICOS DO MUNICÍPIO DE {municipio.replace('_', ' ').upper()} - {rpps}",
+        f"ATA DA REUNIÃO {'DO COMITÊ DE INVESTIMENTOS' if investimentos else 'DO CONSELHO DELIBERATIVO'}",
+        f"Aos {rng.randint(1, 28)} dias de {mes} de {ano}, reuniram-se os membros presentes.",
+    ]
+
+    frases = FRASES_INVEST if investimentos else FRASES_ADMIN
+    for _ in range(rng.randint(12, 30)):
+        linhas.append(rng.choice(frases).format(
+            taxa=rng.choice(["4,5", "5,0", "5,2"]),
+            gestor=rng.choice(GESTORES),
+            rent=f"{rng.uniform(-1, 2):.2f}".replace(".", ","),
+            meta=f"{rng.uniform(0.3, 0.9):.2f}".replace(".", ","),
+            pct=rng.randint(5, 60),
+            valor=rng.randint(100, 9000),
+        ))
+
+    linhas.append("Página 1 de 1")
+    return "\n".join(linhas)
+
+def generate(root, n_docs: int, seed: int = 42, invest_ratio: float = 0.7, fmt: str = "pdf"):
+    """
+    Escreve n_docs atas em root/data/<UF>/<Municipio>/ (pdf) ou em
+    root/data/raw_txt/<UF>/<Municipio>/ (txt). Retorna a lista de RPPS.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    locais = [(uf, m) for uf, ms in MUNICIPIOS.items() for m in ms]
+
+    if fmt == "pdf":
+        import fitz
+
+    for i in range(n_docs):
+        uf, municipio = locais[i % len(locais)]
+        rpps = rpps_for(municipio)
+        ano = rng.randint(2018, 2024)
+        text = ata_text(rng, rpps, municipio, ano, rng.random() < invest_ratio)
+        name = f"{i:06d}_Ata_{rpps}_{ano}"
+
+        if fmt == "pdf":
+            out = root / "data" / uf / municipio / f"{name}.pdf"
+            out.parent.mkdir(parents=True, exist_ok=True)
+
+            doc = fitz.open()
+            linhas = text.splitlines()
+            for start in range(0, len(linhas), 40):
+                page = doc.new_page()
+                page.insert_textbox(
+                    fitz.Rect(40, 40, 555, 800),
+                    "\n".join(linhas[start:start + 40]),
+                    fontsize=8
+                )
+            doc.save(str(out))
+            doc.close()
+        else:
+            out = root / "data" / "raw_txt" / uf / municipio / f"{name}.txt"
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(text, encoding="utf-8")
+
+    return sorted({rpps_for(m) for _, m in locais})
@@ -1,10 +1,14 @@
 import os
 import json
-import faiss
 import numpy as np
 import re
+import argparse
+from datetime import datetime
 from pathlib import Path
-from embedder import embed
+from embedder import embed_batch, MODEL_NAME, MAX_LENGTH
+from partitions import PARTITION_KEYS, geo_from_path, partition_for_path
+from index_writer import StreamingIndexWriter, files_key
+from embedding_cache import open_cache, embed_with_cache
 
 # --------------------------------------------------
 # CONFIG
@@ -13,8 +17,12 @@ from embedder import embed
 TXT_ROOT = "data/processed_txt/investimentos"
 META_OUT = "embeddings/metadata.json"
 INDEX_OUT = "embeddings/vector_store.faiss"
+SHARDS_DIR = "embeddings/shards"
+MANIFEST_OUT = os.path.join(SHARDS_DIR, "manifest.json")
+MANIFEST_RETIRED = os.path.join(SHARDS_DIR, "manifest.retired.json")
 
 os.makedirs("embeddings", exist_ok=True)
+os.makedirs(SHARDS_DIR, exist_ok=True)
 
 # --------------------------------------------------
 # EXTRAÇÃO E HEURÍSTICAS
@@ -105,69 +113,183 @@ def list_txts():
 # BUILD
 # --------------------------------------------------
 
-def build():
-    metadata = []
-    vectors = []
+def add_file(writer, path, cache=None):
+    text = Path(path).read_text(encoding="utf-8", errors="ignore")
 
-    txt_files = list(list_txts())
-    print(f"📄 TXT de investimentos encontrados: {len(txt_files)}")
+    if not text or len(text) < 100:
+        return
 
-    for i, path in enumerate(txt_files, start=1):
-        try:
-            text = Path(path).read_text(encoding="utf-8", errors="ignore")
+    text = text[:6000]
 
-            if not text or len(text) < 100:
-                continue
+    vec = embed_with_cache(cache, [text], embed_batch)[0]
+    if not isinstance(vec, (list, np.ndarray)) or len(vec) != 768:
+        return
 
-            text = text[:6000]
+    rpps = extract_rpps(text, path)
+    date_info = extract_date(text)
+    doc_type = classify_document(text)
+    flags = semantic_flags(text)
 
-            vec = embed(text)
-            if not isinstance(vec, (list, np.ndarray)) or len(vec) != 768:
-                continue
+    writer.add(vec, {
+        "path": path,
+        "text": text[:2500],
+        "rpps": rpps,
+        "orgao": doc_type,
+        "ano": date_info["ano"],
+        "mes": date_info["mes"],
+        **geo_from_path(path),
+        **flags
+    })
 
-            rpps = extract_rpps(text, path)
-            date_info = extract_date(text)
-            doc_type = classify_document(text)
-            flags = semantic_flags(text)
+def build_shard(txt_files, index_out, meta_out, cache=None):
+    work_dir = os.path.join(os.path.dirname(index_out), "build")
+    writer = StreamingIndexWriter(work_dir, len(txt_files), 768, files_key(txt_files))
+
+    for i, path in enumerate(txt_files[writer.files_done:], start=writer.files_done + 1):
+        try:
+            add_file(writer, path, cache)
+        except Exception as e:
+            print(f"[ERRO] {path}: {e}")
 
-            vectors.append(vec)
+        # fora de finally: um Ctrl-C no meio do arquivo não o marca como feito
+        writer.file_done()
 
-            metadata.append({
-                "path": path,
-                "text": text[:2500],
-                "rpps": rpps,
-                "orgao": doc_type,
-                "ano": date_info["ano"],
-                "mes": date_info["mes"],
-                **flags
-            })
+        if i % 200 == 0:
+            print(f"🔄 Processados {i}/{len(txt_files)}")
 
-            if i % 200 == 0:
-                print(f"🔄 Processados {i}/{len(txt_files)}")
+    return writer.finish(index_out, meta_out)
 
-        except Exception as e:
-            print(f"[ERRO] {path}: {e}")
+def load_manifest():
+    if Path(MANIFEST_OUT).exists():
+        return json.loads(Path(MANIFEST_OUT).read_text(encoding="utf-8"))
+    return None
 
-    if not vectors:
-        raise RuntimeError("❌ Nenhum embedding válido foi gerado.")
+def report_cache(cache):
+    if cache is None:
+        return
+    cache.flush()
+    s = cache.stats()
+    print(f"💾 Cache de embeddings: {s['hits']} reaproveitados, {s['misses']} novos")
 
-    arr = np.array(vectors).astype("float32")
+def save_manifest(manifest):
+    Path(MANIFEST_OUT).write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2),
+        encoding="utf-8"
+    )
+
+def retire_manifest():
+    """
+    Um build plano vira o layout ativo: sem isso a API continuaria lendo
+    os shards antigos, que têm precedência sobre o índice único.
+    """
+    if Path(MANIFEST_OUT).exists():
+        os.replace(MANIFEST_OUT, MANIFEST_RETIRED)
+        print(f"🗂️ Manifest de shards desativado: {MANIFEST_RETIRED}")
+
+def build(shard_by="none", only=None):
+    if only:
+        # --only reconstrói shards do layout atual, nunca o índice único
+        if shard_by is None:
+            manifest = load_manifest()
+            if not manifest:
+                raise RuntimeError("❌ --only exige shards existentes ou --shard-by uf/municipio.")
+            shard_by = manifest["partition_key"]
+        if shard_by == "none":
+            raise RuntimeError("❌ --only não se aplica ao índice único (--shard-by none).")
+    elif shard_by is None:
+        shard_by = "none"
+
+    # ordem estável: o checkpoint do build depende dela
+    txt_files = sorted(list_txts())
+    print(f"📄 TXT de investimentos encontrados: {len(txt_files)}")
 
-    index = faiss.IndexFlatL2(arr.shape[1])
-    index.add(arr)
+    cache = open_cache(MODEL_NAME, MAX_LENGTH)
+
+    if shard_by == "none":
+        build_shard(txt_files, INDEX_OUT, META_OUT, cache)
+        retire_manifest()
+        report_cache(cache)
+        print("🎉 Index reconstruído com metadata enriquecida!")
+        print(f"📦 FAISS: {INDEX_OUT}")
+        print(f"📝 Metadata: {META_OUT}")
+        return
+
+    groups = {}
+    for path in txt_files:
+        groups.setdefault(partition_for_path(path, shard_by), []).append(path)
+
+    unknown = sorted(set(only or ()) - set(groups))
+    if unknown:
+        raise RuntimeError(
+            f"❌ Shards sem TXT por '{shard_by}': {', '.join(unknown)} "
+            f"(disponíveis: {', '.join(sorted(groups))})"
+        )
+
+    manifest = load_manifest()
+    if manifest and manifest["partition_key"] != shard_by:
+        if only:
+            raise RuntimeError(
+                f"❌ Shards existentes usam '{manifest['partition_key']}'; "
+                f"reconstrua tudo antes de usar --only com '{shard_by}'."
+            )
+        manifest = None
+
+    if not manifest:
+        manifest = {"partition_key": shard_by, "shards": {}}
+
+    for name in sorted(groups):
+        if only and name not in only:
+            continue
+
+        shard_dir = os.path.join(SHARDS_DIR, name)
+        os.makedirs(shard_dir, exist_ok=True)
+
+        print(f"🧩 Shard {name}: {len(groups[name])} TXT")
+        try:
+            n_docs = build_shard(
+                groups[name],
+                os.path.join(shard_dir, "vector_store.faiss"),
+                os.path.join(shard_dir, "metadata.json"),
+                cache
+            )
+        except RuntimeError as e:
+            print(f"[SKIP] Shard {name}: {e}")
+            continue
+
+        manifest["shards"][name] = {
+            "docs": n_docs,
+            "built_at": datetime.now().isoformat(timespec="seconds")
+        }
 
-    faiss.write_index(index, INDEX_OUT)
+    # rebuild completo: remove do manifest shards que não existem mais
+    if not only:
+        for name in list(manifest["shards"]):
+            if name not in groups:
+                del manifest["shards"][name]
 
-    with open(META_OUT, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    save_manifest(manifest)
+    report_cache(cache)
 
-    print("🎉 Index reconstruído com metadata enriquecida!")
-    print(f"📦 FAISS: {INDEX_OUT}")
-    print(f"📝 Metadata: {META_OUT}")
+    print(f"🎉 {len(manifest['shards'])} shards por '{shard_by}' prontos!")
+    print(f"🗂️ Manifest: {MANIFEST_OUT}")
 
 # --------------------------------------------------
 # MAIN
 # --------------------------------------------------
 
 if __name__ == "__main__":
-    build()
+    parser = argparse.ArgumentParser(description="Constrói o índice FAISS das atas.")
+    parser.add_argument(
+        "--shard-by",
+        choices=PARTITION_KEYS,
+        help="um índice por UF ou por município (padrão: índice único; "
+             "com --only, o particionamento dos shards existentes)"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        help="reconstrói apenas estes shards (ex.: SC PR)"
+    )
+    args = parser.parse_args()
+
+    build(args.shard_by, set(args.only) if args.only else None)
@@ -4,6 +4,7 @@ from transformers import AutoTokenizer, AutoModel
 import numpy as np
 
 MODEL_NAME = "intfloat/multilingual-e5-base"
+MAX_LENGTH = 512
 
 print(f"[EMBEDDER] Carregando modelo {MODEL_NAME} ...")
 
@@ -15,7 +16,7 @@ model.eval()
 def embed(text: str):
     encoded = tokenizer(
         text,
-        max_length=512,
+        max_length=MAX_LENGTH,
         padding=True,
         truncation=True,
         return_tensors="pt"
@@ -31,3 +32,25 @@ def embed(text: str):
         raise ValueError(f"Embedding com shape inesperado: {vec.shape}")
 
     return vec.tolist()
+
+@torch.no_grad()
+def embed_batch(texts):
+    """Um único forward pass para vários textos (mesma saída de embed())."""
+    if not texts:
+        return []
+
+    encoded = tokenizer(
+        list(texts),
+        max_length=MAX_LENGTH,
+        padding=True,
+        truncation=True,
+        return_tensors="pt"
+    )
+
+    model_output = model(**encoded)
+    vecs = model_output.last_hidden_state[:, 0, :].cpu().numpy()
+
+    if vecs.shape[1] != 768:
+        raise ValueError(f"Embedding com shape inesperado: {vecs.shape}")
+
+    return [v.tolist() for v in vecs]
@@ -0,0 +1,157 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+# --------------------------------------------------
+# CACHE PERSISTENTE DE EMBEDDINGS
+# --------------------------------------------------
+# Vetores em float16, em arquivos append-only (shard-00000.f16, ...) por
+# modelo/max_length, com um índice sqlite (model, max_length, sha256 do
+# texto) → (shard, linha). Rebuilds só embedam texto realmente novo.
+
+CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embeddings/cache")
+CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+SHARD_ROWS = 50000
+COMMIT_EVERY = 200
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, max_length: int, dim: int = 768, root: str = CACHE_DIR):
+        self.model = model_name
+        self.max_length = max_length
+        self.dim = dim
+        self.row_bytes = dim * 2
+        self.dir = os.path.join(root, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)}_{max_length}")
+        os.makedirs(self.dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                max_length INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                shard INTEGER NOT NULL,
+                row INTEGER NOT NULL,
+                PRIMARY KEY (model, max_length, hash)
+            )
+        """)
+        self.db.commit()
+
+        self.shard = self._last_shard()
+        self.pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.dir, f"shard-{shard:05d}.f16")
+
+    def _last_shard(self) -> int:
+        shard = 0
+        while os.path.exists(self._shard_path(shard + 1)):
+            shard += 1
+        return shard
+
+    def _rows(self, shard: int) -> int:
+        path = self._shard_path(shard)
+        return os.path.getsize(path) // self.row_bytes if os.path.exists(path) else 0
+
+    def get_many(self, texts):
+        hashes = [text_hash(t) for t in texts]
+        out = [None] * len(texts)
+
+        with self.lock:
+            locs = {}
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT hash, shard, row FROM embeddings "
+                    f"WHERE model = ? AND max_length = ? AND hash IN ({','.join('?' * len(part))})",
+                    [self.model, self.max_length, *part]
+                ).fetchall()
+                locs.update({h: (s, r) for h, s, r in rows})
+
+            files = {}
+            try:
+                for i, h in enumerate(hashes):
+                    if h not in locs:
+                        continue
+                    shard, row = locs[h]
+                    if shard not in files:
+                        files[shard] = open(self._shard_path(shard), "rb")
+                    f = files[shard]
+                    f.seek(row * self.row_bytes)
+                    buf = f.read(self.row_bytes)
+                    if len(buf) == self.row_bytes:
+                        out[i] = np.frombuffer(buf, dtype="float16").astype("float32")
+            finally:
+                for f in files.values():
+                    f.close()
+
+            found = sum(v is not None for v in out)
+            self.hits += found
+            self.misses += len(out) - found
+
+        return out
+
+    def put_many(self, texts, vecs):
+        with self.lock:
+            for text, vec in zip(texts, vecs):
+                h = text_hash(text)
+
+                rows = self._rows(self.shard)
+                if rows >= SHARD_ROWS:
+                    self.shard += 1
+                    rows = 0
+
+                arr = np.asarray(vec, dtype="float16")
+                if arr.shape != (self.dim,):
+                    continue
+
+                # dado primeiro, índice depois: o sqlite nunca aponta para linha inexistente
+                with open(self._shard_path(self.shard), "ab") as f:
+                    f.write(arr.tobytes())
+
+                self.db.execute(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                    (self.model, self.max_length, h, self.shard, rows)
+                )
+                self.pending += 1
+
+            if self.pending >= COMMIT_EVERY:
+                self.db.commit()
+                self.pending = 0
+
+    def flush(self):
+        with self.lock:
+            self.db.commit()
+            self.pending = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+def embed_with_cache(cache, texts, embed_batch):
+    """Busca no cache e só embeda (em lote) os textos ausentes."""
+    if cache is None:
+        return embed_batch(texts)
+
+    vecs = cache.get_many(texts)
+    missing = [i for i, v in enumerate(vecs) if v is None]
+
+    if missing:
+        new = embed_batch([texts[i] for i in missing])
+        cache.put_many([texts[i] for i in missing], new)
+        for i, v in zip(missing, new):
+            vecs[i] = v
+
+    return vecs
+
+def open_cache(model_name: str, max_length: int):
+    return EmbeddingCache(model_name, max_length) if CACHE_ENABLED else None
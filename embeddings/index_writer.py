@@ -0,0 +1,164 @@
+import os
+import json
+import shutil
+import hashlib
+import faiss
+import numpy as np
+from pathlib import Path
+
+# --------------------------------------------------
+# ESCRITA INCREMENTAL DO ÍNDICE
+# --------------------------------------------------
+# Vetores vão direto para um memmap em disco (work_dir/vectors.f32),
+# metadata em chunks JSONL append-only, e um checkpoint.json é gravado
+# a cada CHECKPOINT_EVERY arquivos. Um build interrompido retoma do
+# último checkpoint em vez de re-embedar tudo.
+
+CHECKPOINT_EVERY = int(os.getenv("BUILD_CHECKPOINT_EVERY", "200"))
+ADD_BATCH = 10000
+
+def files_key(paths) -> str:
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.tmp"
+    Path(tmp).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+class StreamingIndexWriter:
+    def __init__(self, work_dir: str, capacity: int, dim: int, key: str):
+        self.work_dir = work_dir
+        self.vectors_path = os.path.join(work_dir, "vectors.f32")
+        self.checkpoint_path = os.path.join(work_dir, "checkpoint.json")
+        self.dim = dim
+        self.capacity = max(1, capacity)
+        self.key = key
+
+        state = self._load_checkpoint()
+        if state:
+            self.files_done = state["files_done"]
+            self.n_vectors = state["n_vectors"]
+            self.chunks = state["chunks"]
+            mode = "r+"
+            print(f"♻️ Retomando build: {self.files_done} arquivos, {self.n_vectors} vetores")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            os.makedirs(work_dir, exist_ok=True)
+            self.files_done = 0
+            self.n_vectors = 0
+            self.chunks = 0
+            mode = "w+"
+
+        self.vectors = np.memmap(
+            self.vectors_path, dtype="float32", mode=mode,
+            shape=(self.capacity, dim)
+        )
+        self.pending = []
+        self.since_checkpoint = 0
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+
+        state = json.loads(Path(self.checkpoint_path).read_text(encoding="utf-8"))
+        if (
+            state.get("key") != self.key
+            or state.get("dim") != self.dim
+            or state.get("capacity") != self.capacity
+        ):
+            print("⚠️ Checkpoint de outro conjunto de arquivos; recomeçando do zero")
+            return None
+
+        chunks = [
+            os.path.join(self.work_dir, f"metadata-{c:05d}.jsonl")
+            for c in range(state.get("chunks", 0))
+        ]
+        if (
+            not os.path.exists(self.vectors_path)
+            or os.path.getsize(self.vectors_path) < self.capacity * self.dim * 4
+            or not all(os.path.exists(c) for c in chunks)
+        ):
+            print("⚠️ Checkpoint sem vetores ou metadata completos; recomeçando do zero")
+            return None
+
+        return state
+
+    def add(self, vec, meta):
+        self.vectors[self.n_vectors] = vec
+        self.n_vectors += 1
+        self.pending.append(meta)
+
+    def file_done(self):
+        """Marca um arquivo de entrada como processado (com ou sem vetor)."""
+        self.files_done += 1
+        self.since_checkpoint += 1
+        if self.since_checkpoint >= CHECKPOINT_EVERY:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.vectors.flush()
+
+        if self.pending:
+            chunk = os.path.join(self.work_dir, f"metadata-{self.chunks:05d}.jsonl")
+            with open(chunk, "w", encoding="utf-8") as f:
+                for m in self.pending:
+                    f.write(json.dumps(m, ensure_ascii=False) + "\n")
+            self.chunks += 1
+            self.pending = []
+
+        _write_json_atomic(self.checkpoint_path, {
+            "key": self.key,
+            "dim": self.dim,
+            "capacity": self.capacity,
+            "files_done": self.files_done,
+            "n_vectors": self.n_vectors,
+            "chunks": self.chunks
+        })
+        self.since_checkpoint = 0
+
+    def iter_metadata(self):
+        for c in range(self.chunks):
+            chunk = os.path.join(self.work_dir, f"metadata-{c:05d}.jsonl")
+            with open(chunk, encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def finish(self, index_out: str, meta_out: str) -> int:
+        if not self.n_vectors:
+            # sem isso o próximo build "retomaria" o mesmo work_dir vazio
+            del self.vectors
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            raise RuntimeError("❌ Nenhum embedding válido foi gerado.")
+
+        self.checkpoint()
+
+        index = faiss.IndexFlatL2(self.dim)
+        for start in range(0, self.n_vectors, ADD_BATCH):
+            end = min(start + ADD_BATCH, self.n_vectors)
+            index.add(np.ascontiguousarray(self.vectors[start:end]))
+
+        faiss.write_index(index, index_out)
+
+        # metadata.json escrito em streaming, sem carregar tudo na memória
+        tmp = f"{meta_out}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("[\n")
+            for i, m in enumerate(self.iter_metadata()):
+                if i:
+                    f.write(",\n")
+                f.write(json.dumps(m, ensure_ascii=False, indent=2))
+            f.write("\n]\n")
+        os.replace(tmp, meta_out)
+
+        # o checkpoint sai primeiro: se o processo cair daqui em diante, o
+        # próximo build recomeça do zero em vez de retomar vetores truncados
+        n = self.n_vectors
+        os.remove(self.checkpoint_path)
+        del self.vectors
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+        return n
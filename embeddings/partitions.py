@@ -0,0 +1,69 @@
+import re
+
+# --------------------------------------------------
+# GEOGRAFIA (UF / MUNICÍPIO) A PARTIR DO PATH
+# --------------------------------------------------
+# Os documentos ficam em data/<UF>/<Municipio>/..., e essa estrutura
+# é preservada em raw_txt e processed_txt.
+
+UFS = {
+    "AC": "acre", "AL": "alagoas", "AP": "amapá", "AM": "amazonas",
+    "BA": "bahia", "CE": "ceará", "DF": "distrito federal",
+    "ES": "espírito santo", "GO": "goiás", "MA": "maranhão",
+    "MT": "mato grosso", "MS": "mato grosso do sul", "MG": "minas gerais",
+    "PA": "pará", "PB": "paraíba", "PR": "paraná", "PE": "pernambuco",
+    "PI": "piauí", "RJ": "rio de janeiro", "RN": "rio grande do norte",
+    "RS": "rio grande do sul", "RO": "rondônia", "RR": "roraima",
+    "SC": "santa catarina", "SP": "são paulo", "SE": "sergipe",
+    "TO": "tocantins"
+}
+
+PARTITION_KEYS = ("none", "uf", "municipio")
+
+NO_PARTITION = "_sem_uf"
+
+def split_path(path: str):
+    return [p for p in re.split(r"[\\/]+", str(path)) if p]
+
+def geo_from_path(path: str):
+    parts = split_path(path)
+    for i, part in enumerate(parts[:-1]):
+        if part.upper() in UFS:
+            municipio = parts[i + 1] if i + 1 < len(parts) - 1 else None
+            return {"uf": part.upper(), "municipio": municipio}
+    return {"uf": None, "municipio": None}
+
+def partition_for_path(path: str, key: str) -> str:
+    if key not in PARTITION_KEYS:
+        raise ValueError(f"Chave de partição inválida: {key}")
+
+    if key == "none":
+        return "all"
+
+    geo = geo_from_path(path)
+    if not geo["uf"]:
+        return NO_PARTITION
+
+    if key == "municipio" and geo["municipio"]:
+        return f"{geo['uf']}__{geo['municipio']}"
+
+    return geo["uf"]
+
+def detect_ufs(text: str):
+    """UFs citadas na pergunta, por sigla (maiúscula) ou por nome."""
+    found = set()
+
+    # pergunta toda em maiúsculas gera falso positivo ("SE", "TO", "PA")
+    if not text.isupper():
+        for sigla in re.findall(r"\b([A-Z]{2})\b", text):
+            if sigla in UFS:
+                found.add(sigla)
+
+    t = text.lower()
+    # nomes mais longos primeiro ("mato grosso do sul" antes de "mato grosso")
+    for sigla, nome in sorted(UFS.items(), key=lambda x: -len(x[1])):
+        if re.search(rf"\b{nome}\b", t):
+            found.add(sigla)
+            t = t.replace(nome, " ")
+
+    return sorted(found)
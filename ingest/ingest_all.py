@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 from extract_text import extract_any_text
 from ocr_local import ocr_pdf
-from pdf_state import load_state, save_state, sha256_file
+from pdf_state import load_state, save_state, sha256_file, retire_stale_txt
 
 PDF_DIR = "data"
 RAW_TXT_DIR = "data/raw_txt"
@@ -11,11 +11,17 @@ os.makedirs(RAW_TXT_DIR, exist_ok=True)
 
 state = load_state()
 
+def txt_path(path: Path) -> Path:
+    return path.relative_to(PDF_DIR).with_suffix(".txt")
+
 def process_document(path: Path):
     try:
         file_hash = sha256_file(path)
 
-        if state.get(str(path)) == file_hash:
+        # preserva data/<UF>/<Municipio>/... (usado no sharding do índice)
+        out = Path(RAW_TXT_DIR) / txt_path(path)
+
+        if state.get(str(path)) == file_hash and out.exists():
             return
 
         text = extract_any_text(str(path))
@@ -27,7 +33,7 @@ def process_document(path: Path):
             print(f"[SKIP] Sem texto útil: {path}")
             return
 
-        out = Path(RAW_TXT_DIR) / (path.stem + ".txt")
+        out.parent.mkdir(parents=True, exist_ok=True)
         out.write_text(text, encoding="utf-8")
 
         state[str(path)] = file_hash
@@ -36,19 +42,23 @@ def process_document(path: Path):
     except Exception as e:
         print(f"[ERRO] {path}: {e}")
 
-def main():
-    pdfs = [
+def list_documents():
+    return [
         p for p in Path(PDF_DIR).rglob("*.*")
         if p.suffix.lower() in [".pdf", ".doc", ".docx"]
         and "raw_txt" not in p.parts
         and "processed_txt" not in p.parts
     ]
 
+def main():
+    pdfs = list_documents()
+
     print(f"📄 Documentos encontrados: {len(pdfs)}")
 
     for doc in pdfs:
         process_document(doc)
 
+    retire_stale_txt(RAW_TXT_DIR, [txt_path(p) for p in pdfs])
     save_state(state)
     print("🎉 Ingest finalizado")
 
@@ -18,3 +18,27 @@ def sha256_file(path):
         for chunk in iter(lambda: f.read(1024 * 1024), b""):
             h.update(chunk)
     return h.hexdigest()
+
+def retire_stale_txt(root, keep, legacy_root="data/legacy_txt"):
+    """
+    Move para legacy_root os TXT de root que não estão em keep (caminhos
+    relativos a root). Cobre a migração do layout plano (raw_txt/<nome>.txt)
+    para o aninhado (raw_txt/<UF>/<Municipio>/...), que do contrário deixaria
+    os dois lados a lado e indexaria cada documento duas vezes.
+    """
+    root = Path(root)
+    keep = {Path(k) for k in keep}
+    moved = 0
+
+    for path in list(root.rglob("*.txt")):
+        rel = path.relative_to(root)
+        if rel in keep:
+            continue
+        dest = Path(legacy_root) / root.name / rel
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        path.replace(dest)
+        moved += 1
+
+    if moved:
+        print(f"🧹 {moved} TXT sem origem movidos de {root} para {legacy_root}")
+    return moved
@@ -1,6 +1,7 @@
 import os
 import re
 from pathlib import Path
+from pdf_state import retire_stale_txt
 
 # --------------------------------------------------
 # CONFIG
@@ -67,6 +68,11 @@ def clean_text(text: str) -> str:
 
 def process_all():
     txt_files = list(Path(RAW_TXT_ROOT).rglob("*.txt"))
+    rels = [p.relative_to(RAW_TXT_ROOT) for p in txt_files]
+
+    # processed_txt espelha raw_txt: o que não tem mais origem sai do caminho
+    for out_dir in (INVEST_DIR, ADMIN_DIR):
+        retire_stale_txt(out_dir, rels)
 
     print(f"📄 TXT encontrados: {len(txt_files)}")
 
@@ -88,8 +94,9 @@ def process_all():
                 out_dir = ADMIN_DIR
                 admin_count += 1
 
-            out_path = os.path.join(out_dir, path.name)
-            Path(out_path).write_text(text, encoding="utf-8")
+            out_path = Path(out_dir) / path.relative_to(RAW_TXT_ROOT)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            out_path.write_text(text, encoding="utf-8")
 
         except Exception as e:
             print(f"[ERRO] {path}: {e}")
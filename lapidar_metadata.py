@@ -3,6 +3,7 @@ import re
 from pathlib import Path
 
 META_PATH = Path("embeddings/metadata.json")
+SHARDS_DIR = Path("embeddings/shards")
 
 BANCO_BLACKLIST = [
     "BANCO", "BB ", "BRADESCO", "CAIXA",
@@ -65,8 +66,8 @@ def extract_rpps_from_text(text: str):
 
     return sorted(encontrados)
 
-def main():
-    data = json.loads(META_PATH.read_text(encoding="utf-8"))
+def lapidar(meta_path: Path):
+    data = json.loads(meta_path.read_text(encoding="utf-8"))
 
     preenchidos = 0
     limpos = 0
@@ -93,21 +94,29 @@ def main():
         d["rpps"] = rpps_limpos
         d["rpps_canonico"] = rpps_limpos[0] if rpps_limpos else None
 
-    backup = META_PATH.with_suffix(".backup.json")
+    backup = meta_path.with_suffix(".backup.json")
     backup.write_text(
         json.dumps(data, ensure_ascii=False, indent=2),
         encoding="utf-8"
     )
 
-    META_PATH.write_text(
+    meta_path.write_text(
         json.dumps(data, ensure_ascii=False, indent=2),
         encoding="utf-8"
     )
 
-    print("✅ Metadata lapidada com sucesso")
+    print(f"✅ Metadata lapidada com sucesso: {meta_path}")
     print(f"🧹 RPPS limpos/normalizados: {limpos}")
     print(f"🔧 RPPS preenchidos via texto: {preenchidos}")
     print(f"🗂️ Backup criado em: {backup}")
 
+def main():
+    # índice único + metadata de cada shard (build_index --shard-by)
+    paths = [META_PATH] if META_PATH.exists() else []
+    paths += sorted(SHARDS_DIR.glob("*/metadata.json"))
+
+    for meta_path in paths:
+        lapidar(meta_path)
+
 if __name__ == "__main__":
     main()
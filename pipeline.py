@@ -0,0 +1,388 @@
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+
+# --------------------------------------------------
+# PIPELINE EM STREAMING: INGEST → PREPARE → ENTIDADES → EMBED
+# --------------------------------------------------
+# Mesmo resultado de ingest_all + prepare_txt + build_index, mas com as
+# etapas rodando ao mesmo tempo, ligadas por filas limitadas. Os TXT
+# intermediários só são gravados com --write-txt. Uso:
+#     python pipeline.py --shard-by uf --write-txt --report pipeline_report.json
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(ROOT, "ingest"), os.path.join(ROOT, "embeddings")]
+
+from ingest_all import PDF_DIR, RAW_TXT_DIR, list_documents, state
+from pdf_state import save_state, sha256_file, retire_stale_txt
+from extract_text import extract_any_text
+from ocr_local import ocr_pdf
+from prepare_txt import INVEST_DIR, ADMIN_DIR, clean_text, is_investment_doc
+from build_index import (
+    INDEX_OUT, META_OUT, SHARDS_DIR, MANIFEST_OUT,
+    extract_rpps, extract_date, classify_document, semantic_flags,
+    save_manifest, retire_manifest, report_cache
+)
+from partitions import PARTITION_KEYS, geo_from_path, partition_for_path
+from index_writer import StreamingIndexWriter, files_key
+from embedding_cache import open_cache, embed_with_cache
+from embedder import embed_batch, MODEL_NAME, MAX_LENGTH
+
+DONE = object()
+
+# --------------------------------------------------
+# ETAPAS GENÉRICAS
+# --------------------------------------------------
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self.get_wait_s = 0.0     # esperando a etapa anterior (fome)
+        self.put_wait_s = 0.0     # bloqueado pela fila seguinte (backpressure)
+        self.lock = threading.Lock()
+
+    def add(self, **kw):
+        with self.lock:
+            for k, v in kw.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def report(self, wall_s):
+        # a origem só produz; as demais etapas medem o que consumiram
+        n = self.items_in or self.items_out
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "busy_s": round(self.busy_s, 3),
+            "items_per_s": round(n / wall_s, 2) if wall_s else None,
+            "starved_s": round(self.get_wait_s, 3),
+            "backpressure_s": round(self.put_wait_s, 3)
+        }
+
+class Stage:
+    """
+    Workers que leem de inbox, aplicam fn e escrevem em outbox.
+    fn retorna None para descartar o item.
+    """
+
+    def __init__(self, name, fn, inbox, outbox, workers=1, downstream_workers=1):
+        self.stats = StageStats(name)
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self.downstream_workers = downstream_workers
+        self.remaining = workers
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{self.stats.name}-{i}", daemon=True)
+            t.start()
+            self.threads.append(t)
+        return self
+
+    def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            item = self.inbox.get()
+            self.stats.add(get_wait_s=time.perf_counter() - t0)
+            if item is DONE:
+                break
+
+            t0 = time.perf_counter()
+            try:
+                out = self.fn(item)
+            except Exception as e:
+                print(f"[ERRO] {self.stats.name}: {e}")
+                self.stats.add(errors=1)
+                out = None
+            self.stats.add(items_in=1, busy_s=time.perf_counter() - t0)
+
+            if out is not None:
+                t0 = time.perf_counter()
+                self.outbox.put(out)
+                self.stats.add(items_out=1, put_wait_s=time.perf_counter() - t0)
+
+        with self.lock:
+            self.remaining -= 1
+            last = self.remaining == 0
+
+        if last:
+            for _ in range(self.downstream_workers):
+                self.outbox.put(DONE)
+
+# --------------------------------------------------
+# FUNÇÕES DAS ETAPAS
+# --------------------------------------------------
+
+def make_extract(write_txt):
+    state_lock = threading.Lock()
+
+    def extract(path: Path):
+        rel = path.relative_to(PDF_DIR).with_suffix(".txt")
+        raw_out = Path(RAW_TXT_DIR) / rel
+        file_hash = sha256_file(path)
+
+        # documento já ingerido antes: reaproveita o TXT bruto
+        if state.get(str(path)) == file_hash and raw_out.exists():
+            return path, rel, raw_out.read_text(encoding="utf-8", errors="ignore")
+
+        text = extract_any_text(str(path))
+        if not text or len(text.strip()) < 50:
+            text = ocr_pdf(str(path))
+
+        if not text or len(text.strip()) < 50:
+            print(f"[SKIP] Sem texto útil: {path}")
+            return None
+
+        if write_txt:
+            raw_out.parent.mkdir(parents=True, exist_ok=True)
+            raw_out.write_text(text, encoding="utf-8")
+            with state_lock:
+                state[str(path)] = file_hash
+
+        return path, rel, text
+
+    return extract
+
+def make_prepare(write_txt):
+    def prepare(item):
+        path, rel, raw_text = item
+        text = clean_text(raw_text)
+        if not text:
+            return None
+
+        invest = is_investment_doc(text)
+        out_path = Path(INVEST_DIR if invest else ADMIN_DIR) / rel
+
+        if write_txt:
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            out_path.write_text(text, encoding="utf-8")
+
+        if not invest:
+            return None
+
+        return path, str(out_path), text
+
+    return prepare
+
+def entities(item):
+    source, path, text = item
+    if len(text) < 100:
+        return None
+
+    text = text[:6000]
+    date_info = extract_date(text)
+
+    return source, text, {
+        "path": path,
+        "text": text[:2500],
+        "rpps": extract_rpps(text, path),
+        "orgao": classify_document(text),
+        "ano": date_info["ano"],
+        "mes": date_info["mes"],
+        **geo_from_path(path),
+        **semantic_flags(text)
+    }
+
+# --------------------------------------------------
+# EMBED EM LOTES (SINK)
+# --------------------------------------------------
+
+def embed_sink(inbox, writers, partition_of, batch_size, flush_s, stats, cache=None):
+    batch = []
+
+    def flush():
+        t0 = time.perf_counter()
+        try:
+            vecs = embed_with_cache(cache, [text for _, text, _ in batch], embed_batch)
+        except Exception as e:
+            print(f"[ERRO] embed: {e}")
+            stats.add(errors=len(batch), items_in=len(batch))
+            batch.clear()
+            return
+
+        for (source, _, meta), vec in zip(batch, vecs):
+            writer = writers[partition_of[str(source)]]
+            writer.add(vec, meta)
+            writer.file_done()
+
+        stats.add(
+            items_in=len(batch),
+            items_out=len(batch),
+            busy_s=time.perf_counter() - t0
+        )
+        batch.clear()
+
+    while True:
+        t0 = time.perf_counter()
+        try:
+            item = inbox.get(timeout=flush_s)
+        except queue.Empty:
+            stats.add(get_wait_s=time.perf_counter() - t0)
+            if batch:
+                flush()
+            continue
+        stats.add(get_wait_s=time.perf_counter() - t0)
+
+        if item is DONE:
+            break
+
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+# --------------------------------------------------
+# MAIN
+# --------------------------------------------------
+
+def run(shard_by="none", write_txt=False, extract_workers=4, prepare_workers=2,
+        batch_size=16, queue_size=64, flush_s=0.2):
+    docs = sorted(list_documents())
+    print(f"📄 Documentos encontrados: {len(docs)}")
+
+    # capacidade de cada shard é conhecida de antemão pelo path de origem
+    partition_of = {str(p): partition_for_path(str(p), shard_by) for p in docs}
+    counts = {}
+    for name in partition_of.values():
+        counts[name] = counts.get(name, 0) + 1
+
+    def targets(name):
+        if shard_by == "none":
+            return INDEX_OUT, META_OUT
+        shard_dir = os.path.join(SHARDS_DIR, name)
+        os.makedirs(shard_dir, exist_ok=True)
+        return (
+            os.path.join(shard_dir, "vector_store.faiss"),
+            os.path.join(shard_dir, "metadata.json")
+        )
+
+    # diretório próprio (não disputa embeddings/build com build_index) e chave
+    # determinística: um pipeline interrompido retoma do último checkpoint
+    writers = {
+        name: StreamingIndexWriter(
+            os.path.join(os.path.dirname(targets(name)[0]), "pipeline_build"),
+            n, 768, files_key(p for p in docs if partition_of[str(p)] == name)
+        )
+        for name, n in counts.items()
+    }
+
+    # documentos já embedados no checkpoint não voltam para a fila
+    done = {
+        Path(m["path"]).relative_to(INVEST_DIR).with_suffix("")
+        for w in writers.values() for m in w.iter_metadata()
+    }
+    pending = [p for p in docs if p.relative_to(PDF_DIR).with_suffix("") not in done]
+    if len(pending) < len(docs):
+        print(f"♻️ {len(docs) - len(pending)} documentos já embedados; retomando")
+
+    q_docs = queue.Queue(maxsize=queue_size)
+    q_raw = queue.Queue(maxsize=queue_size)
+    q_clean = queue.Queue(maxsize=queue_size)
+    q_entities = queue.Queue(maxsize=queue_size)
+
+    stages = [
+        Stage("extract", make_extract(write_txt), q_docs, q_raw, extract_workers, prepare_workers),
+        Stage("prepare", make_prepare(write_txt), q_raw, q_clean, prepare_workers, 1),
+        Stage("entities", entities, q_clean, q_entities, 1, 1),
+    ]
+    embed_stats = StageStats("embed")
+    source_stats = StageStats("source")
+
+    t_start = time.perf_counter()
+    for s in stages:
+        s.start()
+
+    def feed():
+        for p in pending:
+            t0 = time.perf_counter()
+            q_docs.put(p)
+            source_stats.add(items_out=1, put_wait_s=time.perf_counter() - t0)
+        for _ in range(extract_workers):
+            q_docs.put(DONE)
+
+    threading.Thread(target=feed, name="source", daemon=True).start()
+
+    cache = open_cache(MODEL_NAME, MAX_LENGTH)
+    embed_sink(q_entities, writers, partition_of, batch_size, flush_s, embed_stats, cache)
+    wall = time.perf_counter() - t_start
+    report_cache(cache)
+
+    if write_txt:
+        save_state(state)
+        rels = [p.relative_to(PDF_DIR).with_suffix(".txt") for p in docs]
+        for root in (RAW_TXT_DIR, INVEST_DIR, ADMIN_DIR):
+            retire_stale_txt(root, rels)
+
+    manifest = {"partition_key": shard_by, "shards": {}}
+    for name, writer in sorted(writers.items()):
+        index_out, meta_out = targets(name)
+        try:
+            n_docs = writer.finish(index_out, meta_out)
+        except RuntimeError as e:
+            print(f"[SKIP] Shard {name}: {e}")
+            continue
+        manifest["shards"][name] = {
+            "docs": n_docs,
+            "built_at": datetime.now().isoformat(timespec="seconds")
+        }
+
+    if shard_by != "none":
+        save_manifest(manifest)
+        print(f"🗂️ Manifest: {MANIFEST_OUT}")
+    elif manifest["shards"]:
+        retire_manifest()
+
+    report = {
+        "wall_s": round(wall, 3),
+        "documents": len(docs),
+        "indexed": sum(s["docs"] for s in manifest["shards"].values()),
+        "stages": {
+            s.name: s.report(wall)
+            for s in [source_stats] + [st.stats for st in stages] + [embed_stats]
+        },
+        "queues_max": queue_size
+    }
+
+    print("🎉 Pipeline finalizado")
+    for name, r in report["stages"].items():
+        print(
+            f"📊 {name:<9} {r['items_in'] or r['items_out']:>6} itens | {r['items_per_s']} itens/s | "
+            f"ocupado {r['busy_s']}s | fome {r['starved_s']}s | backpressure {r['backpressure_s']}s"
+        )
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest → prepare → embed em streaming.")
+    parser.add_argument("--shard-by", choices=PARTITION_KEYS, default="none")
+    parser.add_argument("--write-txt", action="store_true", help="grava raw_txt e processed_txt")
+    parser.add_argument("--extract-workers", type=int, default=4)
+    parser.add_argument("--prepare-workers", type=int, default=2)
+    parser.add_argument("--batch", type=int, default=16, help="textos por forward pass")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--report", help="grava o relatório de throughput (JSON)")
+    args = parser.parse_args()
+
+    report = run(
+        args.shard_by, args.write_txt, args.extract_workers,
+        args.prepare_workers, args.batch, args.queue_size
+    )
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2), encoding="utf-8")